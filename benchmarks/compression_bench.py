@@ -0,0 +1,70 @@
+"""
+Bytes on the wire and CPU per request: uncompressed, precompressed variants from the
+response cache, and compressing every response on the fly (Starlette's GZipMiddleware).
+
+    python -m benchmarks.compression_bench [--requests 200] [--paths /sofr /all-commodity-prices]
+"""
+import argparse
+import time
+from starlette.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+import main as api
+from precompress import CODINGS, _available, compress_all
+from response_cache import RESPONSE_CACHE
+
+
+PATHS = ["/sofr", "/mortgage-30yr", "/cpi", "/all-commodity-prices", "/all-car-prices", "/mortgage-all"]
+
+
+def cpu_per_request(client: TestClient, path: str, accept_encoding: str, requests: int) -> tuple[float, int]:
+    """
+    Process CPU milliseconds per request and bytes on the wire, after one warm-up request.
+    Client and server share the process, so the client's decompression is included.
+    """
+    client.get(path, headers={"Accept-Encoding": accept_encoding})
+    started = time.process_time()
+    for _ in range(requests):
+        response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+    return (time.process_time() - started) / requests * 1000, response.num_bytes_downloaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    args = parser.parse_args()
+
+    codings = [c for c in CODINGS if _available(c)]
+    precompressed = TestClient(api.app)
+    on_the_fly = TestClient(GZipMiddleware(api.app, compresslevel=9))
+
+    print(f"{'path':<24} {'identity':>9} " + " ".join(f"{c + ' B':>9} {c + ' ms':>8}" for c in codings))
+    for path in args.paths:
+        body = precompressed.get(path, headers={"Accept-Encoding": "identity"}).content
+        sizes = []
+        for coding in codings:
+            started = time.process_time()
+            variant = compress_all(body, [coding]).get(coding, body)
+            sizes.append(f"{len(variant):>9} {(time.process_time() - started) * 1000:>8.1f}")
+        print(f"{path:<24} {len(body):>9} " + " ".join(sizes))
+
+    print()
+    print(f"{'path':<24} {'mode':<22} {'wire B':>9} {'cpu ms/req':>11}")
+    for path in args.paths:
+        RESPONSE_CACHE.clear()
+        precompressed.get(path, headers={"Accept-Encoding": "identity"})
+        RESPONSE_CACHE.wait()
+        for label, accept in [("identity (cached)", "identity"), (f"precompressed {codings[0]}", codings[0])]:
+            ms, wire = cpu_per_request(precompressed, path, accept, args.requests)
+            print(f"{path:<24} {label:<22} {wire:>9} {ms:>11.3f}")
+
+        # same cached identity body, gzipped by the middleware on every request
+        codings_before, RESPONSE_CACHE.codings = RESPONSE_CACHE.codings, ()
+        RESPONSE_CACHE.clear()
+        ms, wire = cpu_per_request(on_the_fly, path, "gzip", args.requests)
+        RESPONSE_CACHE.codings = codings_before
+        print(f"{path:<24} {'gzip per request':<22} {wire:>9} {ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Latency of every route in main.py, driven in-process through TestClient against a
+fixture copy of the data tree. Each route runs without filters and with a date (or year)
+range; p50/p95/p99, throughput and peak traced memory are reported per case.
+
+    python -m benchmarks.endpoints_bench [--requests 30] [--save benchmarks/baselines/endpoints.json]
+    python -m benchmarks.endpoints_bench --compare benchmarks/baselines/endpoints.json [--threshold 0.25]
+
+With --compare the run exits with status 1 when a case's p50 or p95 is more than
+threshold slower than the baseline (and by more than --min-delta-ms, to ignore noise).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+import numpy as np
+import pandas as pd
+
+
+DATE_RANGE = {"start_date": "2010-01-01", "end_date": "2020-06-30"}
+YEAR_RANGE = {"start_year": 2000, "end_year": 2020}
+
+# path parameters and request bodies for routes that need them
+PATH_PARAMS = {"series_id": "CPIAUCSL"}
+# required query parameters, sent with every case of the route
+QUERY_PARAMS = {"/compute": {"expr": "M2SL/GDP"}}
+BODIES = {
+    "/mortgage/calculate": {"principal": [250000, 400000], "rate": [6.5, 7.0], "years": [30, 15], "grid": True, "balance_years": [5, 10]},
+    "/mortgage/schedule": {"principal": [300000], "rate_date": ["2020-01-06"], "years": [30]},
+}
+SKIP = {"/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"}
+
+
+def synthetic_series(name: str) -> pd.DataFrame:
+    """
+    Deterministic monthly random walk standing in for a series missing from the source tree.
+    """
+    dates = pd.date_range("1990-01-01", "2024-12-01", freq="MS")
+    rng = np.random.default_rng(zlib.crc32(name.encode()))
+    values = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.01, len(dates))))
+    return pd.DataFrame({"Date": dates, name: np.round(values, 3)})
+
+
+def fixture_tree(source: str, target: str):
+    """
+    Copy the data tree, fill in any registry series it lacks and build the materialized views,
+    so every route has something to serve.
+    """
+    from storage import locate
+    from utils import load_registry, save_series
+    from views import build_views
+
+    shutil.copytree(source, target, dirs_exist_ok=True)
+    for entry in load_registry(f"{target}/registry.json"):
+        try:
+            locate(target, entry["category"], entry["id"])
+        except FileNotFoundError:
+            save_series(entry["id"], entry["category"], synthetic_series(entry["name"]), root=target)
+            print(f"Fixture: synthetic {entry['category']}/{entry['id']}")
+    build_views(target)
+
+
+def cases(app) -> list[tuple[str, str, dict, dict]]:
+    """
+    (method, path, params, body) for every registered route: unfiltered, then with a range filter.
+    """
+    from fastapi.dependencies.utils import get_flat_dependant
+    from fastapi.routing import APIRoute
+
+    out = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.path in SKIP:
+            continue
+        names = {p.name for p in get_flat_dependant(route.dependant).query_params}
+        path = route.path.format(**PATH_PARAMS) if "{" in route.path else route.path
+
+        required = QUERY_PARAMS.get(route.path, {})
+
+        for method in sorted(route.methods):
+            body = BODIES.get(route.path) if method == "POST" else None
+            out.append((method, path, dict(required), body))
+            if {"start_date", "end_date"} <= names:
+                out.append((method, path, {**required, **DATE_RANGE}, body))
+            elif {"start_year", "end_year"} <= names:
+                out.append((method, path, {**required, **YEAR_RANGE}, body))
+    return out
+
+
+def case_key(method: str, path: str, params: dict) -> str:
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return f"{method} {path}" + (f"?{query}" if query else "")
+
+
+def measure(client, cache, method: str, path: str, params: dict, body, requests: int, keep_cache: bool) -> dict:
+    def call():
+        if not keep_cache:
+            cache.clear()
+        started = time.perf_counter()
+        response = client.request(method, path, params=params, json=body)
+        return time.perf_counter() - started, response
+
+    # warm-up: loads the series, starts pool workers, fills lazy tables
+    _, response = call()
+    if response.status_code >= 400:
+        return {"status": response.status_code, "error": response.text[:200]}
+
+    # one traced run for memory, kept out of the timings since tracing slows allocation
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array([call()[0] for _ in range(requests)]) * 1000
+    return {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "rps": round(float(requests / (latencies.sum() / 1000)), 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def regressions(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    found = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if not current or "p50_ms" not in current or "p50_ms" not in base:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            old, new = base[metric], current[metric]
+            if new > old * (1 + threshold) and new - old > min_delta_ms:
+                found.append(f"{key}: {metric} {old:.2f} -> {new:.2f} ms ({(new / old - 1) * 100:+.0f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=os.getenv("DISCO_DATA_DIR", "data"), help="source data tree for the fixture")
+    parser.add_argument("--requests", type=int, default=30, help="timed requests per case")
+    parser.add_argument("--workers", type=int, default=None, help="DISCO_COMPUTE_WORKERS for the run (0 builds composites in-process)")
+    parser.add_argument("--keep-cache", action="store_true", help="serve repeats from the response cache instead of clearing it")
+    parser.add_argument("--match", default=None, help="only run cases whose key contains this text")
+    parser.add_argument("--save", default=None, help="write results as a JSON baseline")
+    parser.add_argument("--compare", default=None, help="baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # settings are read at import time, so point the app at the fixture before importing anything
+        os.environ["DISCO_DATA_DIR"] = tmp
+        os.environ.setdefault("FRED_API_KEY", "benchmark")
+        if args.workers is not None:
+            os.environ["DISCO_COMPUTE_WORKERS"] = str(args.workers)
+        fixture_tree(args.data, tmp)
+
+        from fastapi.testclient import TestClient
+        import main as api
+        from response_cache import RESPONSE_CACHE
+
+        results = {}
+        print(f"{'case':<62} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'peak KB':>9}")
+        with TestClient(api.app) as client:
+            # time the warm server, not the background warm-up
+            while client.get("/ready").json()["status"] == "warming":
+                time.sleep(0.05)
+            for method, path, params, body in cases(api.app):
+                key = case_key(method, path, params)
+                if args.match and args.match not in key:
+                    continue
+                r = measure(client, RESPONSE_CACHE, method, path, params, body, args.requests, args.keep_cache)
+                results[key] = r
+                if "p50_ms" in r:
+                    print(f"{key:<62} {r['status']:>6} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['rps']:>8.1f} {r['peak_kb']:>9.1f}")
+                else:
+                    print(f"{key:<62} {r['status']:>6}  {r['error']}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "requests": args.requests, "keep_cache": args.keep_cache}
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["results"]
+        found = regressions(results, baseline, args.threshold, args.min_delta_ms)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
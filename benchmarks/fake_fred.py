@@ -0,0 +1,96 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import random
+import threading
+import time
+import pandas as pd
+from storage import locate
+
+
+class FakeFredServer:
+    """
+    Local stand-in for api.stlouisfed.org serving /fred/series/observations from a data tree.
+
+    latency adds a fixed delay per request; failure_rate injects 429/500 responses
+    so retry and rate-limit behaviour can be exercised without touching the real API.
+    """
+
+    def __init__(self, root: str, registry: list[dict], latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.root = root
+        self.categories = {e["id"]: e["category"] for e in registry}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.requests = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/fred"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def observations(self, series_id: str, observation_start: str = None) -> list[dict]:
+        backend, path = locate(self.root, self.categories[series_id], series_id)
+        _, dates, values = backend.read(path)
+        df = pd.DataFrame({"date": dates, "value": values})
+        if observation_start:
+            df = df[df["date"] >= pd.Timestamp(observation_start)]
+
+        return [
+            {"date": d.strftime("%Y-%m-%d"), "value": "." if pd.isna(v) else str(v)}
+            for d, v in zip(df["date"], df["value"])
+        ]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                series_id = params.get("series_id")
+
+                with server._lock:
+                    server.requests.append((time.monotonic(), series_id, params.get("observation_start")))
+                    fail = server.random.random() < server.failure_rate
+                    status = server.random.choice([429, 500, 503]) if fail else 200
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if parts.path != "/fred/series/observations" or series_id not in server.categories:
+                    return self._send(400, {"error_code": 400, "error_message": "Bad Request. The series does not exist."})
+                if status == 429:
+                    return self._send(429, {"error_code": 429, "error_message": "Too Many Requests."}, {"Retry-After": "0"})
+                if status != 200:
+                    return self._send(status, {"error_code": status, "error_message": "Internal Server Error"})
+
+                self._send(200, {"observations": server.observations(series_id, params.get("observation_start"))})
+
+        return Handler
@@ -0,0 +1,29 @@
+"""
+Payload size and encode time per wire format.
+
+    python -m benchmarks.formats_bench [--repeat 50]
+"""
+import argparse
+import gzip
+from benchmarks.serialize_bench import frames, timed
+from serialize import FORMATS, _available
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'frame':<30} {'format':<8} {'bytes':>9} {'gzip':>8} {'encode ms':>10}")
+    for label, df in frames().items():
+        for name, fmt in FORMATS.items():
+            if not _available(name):
+                print(f"{label:<30} {name:<8} {'skipped (pyarrow not installed)':>29}")
+                continue
+            body = fmt.encode(df)
+            ms = timed(lambda: fmt.encode(df), args.repeat)
+            print(f"{label:<30} {name:<8} {len(body):>9} {len(gzip.compress(body)):>8} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
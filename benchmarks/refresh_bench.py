@@ -0,0 +1,57 @@
+"""
+Refresh engine against a local fake FRED server.
+
+    python -m benchmarks.refresh_bench [--latency 0.25] [--failure-rate 0.1] [--workers 1 8]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from benchmarks.fake_fred import FakeFredServer
+from clients import FredClient
+from refresh import RefreshEngine, format_report
+from store import DATA_DIR
+from utils import load_registry
+
+
+def run(workers: int, latency: float, failure_rate: float, rpm: float):
+    registry = load_registry(f"{DATA_DIR}/registry.json")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(DATA_DIR, tmp, dirs_exist_ok=True)
+
+        with FakeFredServer(DATA_DIR, registry, latency=latency, failure_rate=failure_rate) as server:
+            engine = RefreshEngine(
+                client=FredClient(api_key="fake", base_url=server.url),
+                workers=workers,
+                requests_per_minute=rpm,
+                burst=workers,
+                backoff_base=0.05,
+                root=tmp,
+            )
+            started = time.perf_counter()
+            results = engine.refresh(registry)
+            seconds = time.perf_counter() - started
+
+    return results, seconds, len(server.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.25, help="simulated seconds per FRED round-trip")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="share of requests answered with 429/5xx")
+    parser.add_argument("--rpm", type=float, default=6000, help="token bucket requests per minute")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        results, seconds, requests = run(workers, args.latency, args.failure_rate, args.rpm)
+        if args.verbose:
+            print(format_report(results, seconds))
+        ok = sum(r.status == "ok" for r in results)
+        print(f"workers={workers:<3} {ok}/{len(results)} ok  {requests} requests  {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+JSON serialization: sanitize_for_json + JSONResponse versus serialize.json_records.
+
+    python -m benchmarks.serialize_bench [--repeat 50]
+"""
+import argparse
+import json
+import time
+from fastapi.responses import JSONResponse
+import modules.commodities as commodities
+from serialize import json_records
+from utils import fetch_fred_series, sanitize_for_json
+
+
+def frames() -> dict:
+    return {
+        "SOFR (daily)": fetch_fred_series("rates", "SOFR"),
+        "MORTGAGE30US (weekly)": fetch_fred_series("rates", "MORTGAGE30US"),
+        "CPIAUCSL (monthly)": fetch_fred_series("inflation_and_prices", "CPIAUCSL"),
+        "all-commodity-prices (wide)": commodities._fetch_all_commodity_prices(),
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'frame':<30} {'rows':>6} {'baseline ms':>12} {'numpy ms':>9} {'speedup':>8}")
+    for label, df in frames().items():
+        baseline = lambda: JSONResponse(content=sanitize_for_json(df)).body
+        fast = lambda: json_records(df)
+        assert json.loads(baseline()) == json.loads(fast()), label
+
+        old_ms = timed(baseline, args.repeat)
+        new_ms = timed(fast, args.repeat)
+        print(f"{label:<30} {len(df):>6} {old_ms:>12.2f} {new_ms:>9.2f} {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
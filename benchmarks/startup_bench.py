@@ -0,0 +1,122 @@
+"""
+Cold start of the API: import time of main.py, then time to first byte and time to ready
+for a fresh uvicorn process.
+
+    python -m benchmarks.startup_bench [--runs 5] [--path /series/CPIAUCSL]
+"""
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+
+# modules the serving process must not load
+HEAVY_MODULES = ("matplotlib", "fredapi", "openai")
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def import_time() -> tuple[float, list[str]]:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE % (HEAVY_MODULES,)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(port: int, path: str) -> tuple[int, bytes] | None:
+    """
+    (status, body) of GET path, or None while the server is not accepting connections yet.
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def warmed(port: int) -> bool:
+    """
+    Whether warm-up has finished, ready or degraded (a tree missing some series still counts).
+    """
+    response = get(port, "/ready")
+    return response is not None and json.loads(response[1])["status"] != "warming"
+
+
+def cold_start(path: str, timeout: float = 60) -> tuple[float, float]:
+    """
+    Seconds from process launch to the first response for path, and to warm-up finishing.
+    """
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        first_byte = ready = None
+        while ready is None:
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"server not ready after {timeout}s")
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+
+            if first_byte is None:
+                if get(port, path) is not None:
+                    first_byte = time.perf_counter() - started
+            elif warmed(port):
+                ready = time.perf_counter() - started
+            else:
+                time.sleep(0.01)
+        return first_byte, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/series/CPIAUCSL", help="route timed for the first byte")
+    args = parser.parse_args()
+
+    imports, loaded = [], set()
+    for _ in range(args.runs):
+        seconds, heavy = import_time()
+        imports.append(seconds)
+        loaded.update(heavy)
+    print(f"import main       median {statistics.median(imports) * 1000:8.1f} ms  min {min(imports) * 1000:8.1f} ms")
+    print(f"heavy modules     {', '.join(sorted(loaded)) or 'none loaded'}")
+
+    first_bytes, readies = [], []
+    for _ in range(args.runs):
+        first_byte, ready = cold_start(args.path)
+        first_bytes.append(first_byte)
+        readies.append(ready)
+    print(f"first byte {args.path:<20} median {statistics.median(first_bytes) * 1000:8.1f} ms")
+    print(f"ready                          median {statistics.median(readies) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Buffered JSON (json_records) versus ?stream= encoding for long synthetic daily series:
+time to first byte and peak traced memory per request.
+
+    python -m benchmarks.stream_bench [--rows 10000 100000 1000000] [--block-rows 2000]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from serialize import json_records, stream_records
+
+
+def series(rows: int) -> tuple[np.ndarray, np.ndarray]:
+    dates = np.arange(np.datetime64("1900-01-01"), np.datetime64("1900-01-01") + rows).astype("datetime64[ns]")
+    values = np.round(np.random.default_rng(0).normal(100, 10, rows), 2)
+    return dates, values
+
+
+def buffered(dates, values):
+    started = time.perf_counter()
+    body = json_records(pd.DataFrame({"Date": dates, "Value": values}))
+    return time.perf_counter() - started, len(body)
+
+
+def streamed(dates, values, mode: str, block_rows: int):
+    started = time.perf_counter()
+    blocks = ([dates[lo:lo + block_rows], values[lo:lo + block_rows]] for lo in range(0, len(dates), block_rows))
+    first, size = None, 0
+    for chunk in stream_records(["Date", "Value"], blocks, mode):
+        # the bare "[" opening a json stream doesn't count as a first row
+        if first is None and len(chunk) > 1:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    return first, size
+
+
+def traced(fn, *args):
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--block-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    buffered(*series(10))  # build the date lookup tables outside the timings
+    print(f"{'rows':>9} {'mode':<9} {'ttfb ms':>9} {'peak MB':>9} {'body MB':>9}")
+    for rows in args.rows:
+        dates, values = series(rows)
+        cases = [
+            ("buffered", buffered, (dates, values)),
+            ("json", streamed, (dates, values, "json", args.block_rows)),
+            ("ndjson", streamed, (dates, values, "ndjson", args.block_rows)),
+        ]
+        for label, fn, fn_args in cases:
+            # timing and memory come from separate runs, tracing slows allocation down
+            ttfb, size = fn(*fn_args)
+            _, peak = traced(fn, *fn_args)
+            print(f"{rows:>9} {label:<9} {ttfb * 1000:>9.2f} {peak / 2 ** 20:>9.2f} {size / 2 ** 20:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Vintage store on a synthetic daily series refreshed many times (new observations plus
+revisions in a trailing window): disk used versus a full copy per refresh, and time to
+rebuild an as_of vintage from the index versus replaying every refresh.
+
+    python -m benchmarks.vintage_bench [--rows 20000] [--refreshes 200] [--append 5] [--revise 60]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from vintages import VintageStore, _timestamp
+
+
+def refreshes(rows: int, count: int, append: int, revise: int):
+    """
+    Successive (dates, values) states: each appends `append` days and revises the last `revise`.
+    """
+    rng = np.random.default_rng(0)
+    dates = np.arange(np.datetime64("1970-01-01"), np.datetime64("1970-01-01") + rows).astype("datetime64[ns]")
+    values = np.round(rng.normal(100, 10, rows), 2)
+    for _ in range(count):
+        yield dates, values
+        new_dates = dates[-1] + np.arange(1, append + 1).astype("timedelta64[D]")
+        dates = np.concatenate([dates, new_dates])
+        values = np.concatenate([values, np.round(rng.normal(100, 10, append), 2)])
+        values[-revise:] = np.round(values[-revise:] + rng.normal(0, 0.1, revise), 2)
+
+
+def replay(states_until: list[tuple[np.ndarray, np.ndarray]]) -> pd.DataFrame:
+    """
+    What rebuilding from full refresh pulls looks like without an index: merge every one in order.
+    """
+    df = None
+    for dates, values in states_until:
+        pulled = pd.DataFrame({"Date": dates, "Value": values})
+        df = pulled if df is None else pd.concat([df, pulled]).drop_duplicates(subset=["Date"], keep="last")
+    return df.sort_values("Date")
+
+
+def du(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--refreshes", type=int, default=200)
+    parser.add_argument("--append", type=int, default=5)
+    parser.add_argument("--revise", type=int, default=60)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="vintages-")
+    try:
+        store = VintageStore(root=root)
+        states, full_bytes = [], 0
+        started = time.perf_counter()
+        for i, (dates, values) in enumerate(refreshes(args.rows, args.refreshes, args.append, args.revise)):
+            # one refresh per day
+            store.record("bench", "SERIES", "Value", dates, values, recorded=_timestamp(86400 * (20_000 + i)))
+            states.append((dates, values))
+            full_bytes += dates.nbytes + values.nbytes
+        record_ms = (time.perf_counter() - started) / args.refreshes * 1000
+
+        print(f"{args.refreshes} refreshes of {args.rows}+ rows, {record_ms:.2f} ms to record each")
+        print(f"disk: vintages {du(root) / 2 ** 20:.2f} MB, full copy per refresh {full_bytes / 2 ** 20:.2f} MB")
+        print()
+        print(f"{'refresh':>8} {'cold ms':>9} {'warm ms':>9} {'replay ms':>10} {'match':>6}")
+        history = store.history("bench", "SERIES")
+        for i in sorted({0, args.refreshes // 2, args.refreshes - 2, args.refreshes - 1}):
+            as_of = history.days[i]
+            store._cache.clear()
+            started = time.perf_counter()
+            series = store.get("bench", "SERIES", as_of)
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            store.get("bench", "SERIES", as_of)
+            warm = time.perf_counter() - started
+            started = time.perf_counter()
+            expected = replay(states[:i + 1])
+            replayed = time.perf_counter() - started
+            match = np.array_equal(series.dates, expected["Date"].to_numpy()) and np.array_equal(series.values, expected["Value"].to_numpy())
+            print(f"{i:>8} {cold * 1000:>9.2f} {warm * 1000:>9.3f} {replayed * 1000:>10.2f} {str(match):>6}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
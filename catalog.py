@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field, replace
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from deflator import add_real_columns, get_deflator
+from downsample import DOWNSAMPLER
+from metrics import stage, staged
+from resample import RESAMPLER
+from store import DATA_DIR, STORE, Series
+
+
+REGISTRY_PATH = f"{DATA_DIR}/registry.json"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """
+    One registry series and how it is served: optional alias path, unit scale
+    (e.g. 1000 for series FRED reports in thousands) and whether '(Real)' columns are added.
+    """
+    id: str
+    category: str
+    name: str
+    description: str = ""
+    def_freq: str = None
+    path: str = None
+    scale: float = 1
+    add_real: bool = False
+
+    @classmethod
+    def from_registry(cls, item: dict) -> "CatalogEntry":
+        return cls(
+            id=item["id"],
+            category=item["category"],
+            name=item["name"],
+            description=item.get("description", ""),
+            def_freq=item.get("def_freq"),
+            path=item.get("path"),
+            scale=item.get("scale", 1),
+            add_real=item.get("add_real", False),
+        )
+
+
+@dataclass
+class Catalog:
+    """
+    Registry-driven access to every stored series by id. The registry is re-read when
+    the file changes; scaled series are computed once per stored version.
+    """
+    path: str = REGISTRY_PATH
+    _entries: dict = field(default_factory=dict)
+    _stamp: tuple = None
+    _scaled: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def entries(self) -> dict[str, CatalogEntry]:
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if stamp != self._stamp:
+                with open(self.path, "r") as f:
+                    registry = json.load(f)
+                self._entries = {item["id"]: CatalogEntry.from_registry(item) for item in registry}
+                self._stamp = stamp
+            return self._entries
+
+    def entry(self, series_id: str) -> CatalogEntry:
+        """
+        Registry entry for a series id; raises KeyError for unknown ids.
+        """
+        return self.entries()[series_id]
+
+    @staged("transform")
+    def series(self, entry: CatalogEntry) -> Series:
+        """
+        Stored series in the units declared by the registry.
+        """
+        series = STORE.get(entry.category, entry.id)
+        if entry.scale == 1:
+            return series
+
+        # version carries the scale so resampled copies of raw and scaled data never collide
+        version = (*series.version, "scale", entry.scale)
+        with self._lock:
+            cached = self._scaled.get(entry.id)
+        if cached is None or cached.version != version:
+            values = np.asarray(series.values, dtype="float64") * entry.scale
+            cached = replace(series, values=values, version=version)
+            with self._lock:
+                self._scaled[entry.id] = cached
+        return cached
+
+    def slice(self, entry: CatalogEntry, start_date=None, end_date=None, freq=None, agg="mean", max_points=None) -> Series:
+        """
+        Registry series scaled, optionally resampled, then range-sliced (array views, no copy).
+        With max_points, longer slices are LTTB-downsampled to that many observations.
+        """
+        series = self.series(entry)
+        if freq:
+            series = RESAMPLER.get(series, freq, agg)
+        series = series.slice(start_date or None, end_date or None)
+        if max_points:
+            series = DOWNSAMPLER.get(series, max_points, key=(freq, agg))
+        return series
+
+    def frame(self, entry: CatalogEntry, start_date=None, end_date=None, freq=None, agg="mean", max_points=None) -> pd.DataFrame:
+        """
+        Date + value frame for a registry series: scaled, optionally resampled, range-sliced, then downsampled.
+        """
+        df = self.slice(entry, start_date, end_date, freq, agg, max_points).to_frame()
+
+        if entry.add_real and not df.empty:
+            # commodity prices come with '(Real)' columns in dollars of their last month
+            df = add_real_columns(df, base=df["Date"].iloc[-1])
+        return df
+
+    def blocks(self, entry: CatalogEntry, start_date=None, end_date=None, freq=None, agg="mean",
+               real: bool = False, base=None, block_rows: int = 2000, max_points=None):
+        """
+        Same columns as frame() (plus '(Real)' with real=True, in base-month dollars), as
+        (names, iterator of column-array blocks) for streaming. The series is resolved
+        up front so its reads are tracked; real values are computed block by block.
+        """
+        series = self.slice(entry, start_date, end_date, freq, agg, max_points)
+        if not real and entry.add_real and series.rows:
+            real, base = True, series.dates[-1]
+        deflator = get_deflator() if real else None
+
+        names = ["Date", series.name] + ([f"{series.name} (Real)"] if real else [])
+
+        def iterate():
+            for lo in range(0, series.rows, block_rows):
+                dates, values = series.dates[lo:lo + block_rows], series.values[lo:lo + block_rows]
+                if not real:
+                    yield [dates, values]
+                    continue
+                with stage("transform"):
+                    real_values = np.round(np.asarray(values, dtype="float64") * deflator.factors(dates, base=base), 2)
+                yield [dates, values, real_values]
+
+        return names, iterate()
+
+
+CATALOG = Catalog()
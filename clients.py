@@ -1,7 +1,14 @@
-from dataclasses import dataclass
-from openai import OpenAI
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pydantic import BaseModel
+from urllib.parse import urlencode, urlsplit
+import http.client
+import json
+import math
 import os
+import threading
+import pandas as pd
 
 
 @dataclass
@@ -10,6 +17,8 @@ class XAIClient:
     base_url: str = "https://api.x.ai/v1"
 
     def __post_init__(self):
+        from openai import OpenAI
+
         self.client = OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
@@ -63,4 +72,112 @@ class XAIClient:
             return completion.choices[0].message.parsed
         
         except Exception as e:
-            print(f"Error: {e}")
\ No newline at end of file
+            print(f"Error: {e}")
+
+
+def retry_after_seconds(value: str) -> float:
+    """
+    Seconds to wait from a Retry-After header, given as seconds or an HTTP-date.
+    None when the header is missing or can't be parsed.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+        return max(seconds, 0.0) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class FredHTTPError(Exception):
+    """
+    Non-200 response from the FRED API. 429 and 5xx are worth retrying.
+    """
+    def __init__(self, status: int, message: str = "", retry_after: float = None):
+        super().__init__(f"FRED returned HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+@dataclass
+class FredClient:
+    """
+    Minimal FRED observations client shared across refresh workers.
+    Keeps one keep-alive connection per thread and surfaces HTTP status codes.
+    """
+    api_key: str = field(default_factory=lambda: os.getenv("FRED_API_KEY"))
+    base_url: str = field(default_factory=lambda: os.getenv("FRED_API_URL", "https://api.stlouisfed.org/fred"))
+    timeout: float = 30.0
+
+    def __post_init__(self):
+        parts = urlsplit(self.base_url)
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip("/")
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            conn = conn_cls(self._netloc, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, endpoint: str, **params) -> dict:
+        """
+        GET <base_url>/<endpoint> with file_type=json and return the decoded body.
+        """
+        params.update(api_key=self.api_key, file_type="json")
+        url = f"{self._prefix}/{endpoint}?{urlencode(params)}"
+
+        try:
+            conn = self._connection()
+            conn.request("GET", url)
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError):
+            # stale keep-alive socket or network failure; next call reconnects
+            self._reset()
+            raise
+
+        if response.status != 200:
+            retry_after = retry_after_seconds(response.getheader("Retry-After"))
+            try:
+                message = json.loads(body).get("error_message", "")
+            except ValueError:
+                message = body[:200].decode(errors="replace")
+            raise FredHTTPError(response.status, message, retry_after)
+
+        return json.loads(body)
+
+    def get_series(self, series_id: str, observation_start: str = None) -> pd.Series:
+        """
+        Observations for a series as a float Series indexed by date ('.' becomes NaN).
+        """
+        params = {"series_id": series_id}
+        if observation_start is not None:
+            params["observation_start"] = pd.Timestamp(observation_start).strftime("%Y-%m-%d")
+
+        observations = self.request("series/observations", **params).get("observations", [])
+        dates = pd.to_datetime([o["date"] for o in observations])
+        values = [math.nan if o["value"] == "." else float(o["value"]) for o in observations]
+
+        return pd.Series(values, index=dates, dtype="float64")
@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+from fastapi import HTTPException
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from deflator import add_real_columns
+from metrics import record_stages, stage, start_timing, stop_timing
+from serialize import FORMATS, WireFormat
+from store import current_as_of, record_reads, reset_as_of, set_as_of, start_tracking, stop_tracking
+from vintages import NoVintage
+
+
+def frame_job(func, kwargs: dict, fmt_name: str, real: bool = False, real_base: str = None, as_of: str = None):
+    """
+    Build a frame with func(**kwargs), optionally add real columns, and encode it.
+    Runs in a worker process; returns (body, reads, volatile, stage seconds) so the caller
+    can version the response from the inputs the worker read and report its timings.
+    as_of carries the request's ?as_of= into the worker, whose context doesn't have it.
+    """
+    tracker, token = start_tracking()
+    timer, timer_token = start_timing()
+    as_of_token = set_as_of(as_of)
+    try:
+        df = func(**kwargs)
+        if real:
+            df = add_real_columns(df, base=real_base)
+        with stage("serialize"):
+            body = FORMATS[fmt_name].encode(df)
+        return body, tracker.deps, tracker.volatile, timer.seconds
+    finally:
+        reset_as_of(as_of_token)
+        stop_timing(timer_token)
+        stop_tracking(token)
+
+
+def import_modules(names) -> int:
+    """
+    Import modules in a worker so the first job sent to it doesn't pay for them. Returns the worker pid.
+    """
+    for name in names:
+        importlib.import_module(name)
+    return os.getpid()
+
+
+@dataclass
+class ComputePool:
+    """
+    Process pool for CPU-heavy composite builds, so they don't hold the GIL of the
+    serving process. Each job gets a timeout (504 when exceeded). A job that times out
+    keeps running in its worker until done; only its result is dropped.
+
+    workers=0 runs jobs on the server's thread pool instead (same timeout).
+    """
+    workers: int = field(default_factory=lambda: int(os.getenv("DISCO_COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1)))))
+    timeout: float = field(default_factory=lambda: float(os.getenv("DISCO_COMPUTE_TIMEOUT", "30")))
+    _pool: ProcessPoolExecutor = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def executor(self) -> ProcessPoolExecutor | None:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: workers must not inherit the server's threads and locks
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def warm(self, modules=()) -> int:
+        """
+        Start every worker now (spawning takes a while) and import modules in each.
+        Returns the number of workers started.
+        """
+        pool = self.executor()
+        if pool is None:
+            return 0
+        futures = [pool.submit(import_modules, list(modules)) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    async def call(self, func, *args, timeout: float = None):
+        """
+        Run func(*args) in the pool and await it, raising HTTPException(504) on timeout.
+        """
+        pool = self.executor()
+        if pool is None:
+            job = run_in_threadpool(func, *args)
+        else:
+            job = asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+        try:
+            return await asyncio.wait_for(job, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Computation exceeded {timeout or self.timeout:g}s")
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM killed); start a fresh pool for the next job
+            self.shutdown(wait=False)
+            raise
+
+    async def render(self, func, kwargs: dict, fmt: WireFormat, real=None) -> Response:
+        """
+        Build, encode and return a frame-valued composite through the pool.
+        """
+        try:
+            body, reads, volatile, seconds = await self.call(
+                frame_job, func, kwargs, fmt.name, real is not None, real.base if real is not None else None, current_as_of(),
+            )
+        except NoVintage as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        record_reads(reads, volatile)
+        record_stages(seconds)
+        return Response(content=body, media_type=fmt.media_type)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+COMPUTE = ComputePool()
@@ -0,0 +1,196 @@
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+from collections import OrderedDict
+import hashlib
+import os
+from starlette.datastructures import Headers, MutableHeaders
+from metrics import stage
+from precompress import CODINGS, negotiate_encoding
+from response_cache import RESPONSE_CACHE, CachedResponse, ResponseCache
+from store import STORE, start_tracking, stop_tracking
+
+
+MAX_ROUTE_VARIANTS = 10_000
+
+
+def cache_control() -> str:
+    max_age = int(os.getenv("DISCO_CACHE_MAX_AGE", "0"))
+    return f"public, max-age={max_age}, must-revalidate"
+
+
+class ConditionalGetMiddleware:
+    """
+    ETag / Last-Modified support for GET routes backed by the series store.
+
+    The first time a route answers a given query, the store reads it made (series and static files,
+    with their versions) are recorded. Later requests rebuild the validator from a stat()
+    of those inputs only, so If-None-Match / If-Modified-Since hits get a 304 without
+    running the handler. Routes that read nothing from the store, or flag themselves
+    volatile, get no validators.
+
+    Full 200 bodies are also kept in a ResponseCache under the same key and replayed
+    while their inputs are unchanged.
+    """
+
+    def __init__(self, app, salt: str = None, cache: ResponseCache = None):
+        self.app = app
+        self.salt = salt if salt is not None else os.getenv("DISCO_ETAG_SALT", "")
+        self.cache = cache if cache is not None else RESPONSE_CACHE
+        self.route_deps = OrderedDict()
+
+    def learn(self, key, deps: list):
+        self.route_deps[key] = deps
+        self.route_deps.move_to_end(key)
+        while len(self.route_deps) > MAX_ROUTE_VARIANTS:
+            self.route_deps.popitem(last=False)
+
+    def validators(self, path: str, variant: str, versions: dict) -> tuple[str, datetime]:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.salt}|{path}|{variant}".encode())
+        for dep in sorted(versions):
+            digest.update(repr((dep, versions[dep])).encode())
+
+        mtime_ns = max(v[1] for v in versions.values())
+        last_modified = datetime.fromtimestamp(mtime_ns // 1_000_000_000, tz=timezone.utc)
+        return f'"{digest.hexdigest()}"', last_modified
+
+    def current_versions(self, key) -> dict | None:
+        deps = self.route_deps.get(key)
+        if not deps:
+            return None
+        try:
+            return {dep: STORE.dependency_version(dep) for dep in deps}
+        except (OSError, LookupError):
+            return None
+
+    @staticmethod
+    def not_modified(headers: Headers, etag: str, last_modified: datetime) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [ConditionalGetMiddleware.identity_tag(t.strip().removeprefix("W/")) for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def matching_tag(headers: Headers, etag: str) -> str | None:
+        """
+        The If-None-Match tag that matched etag as sent to the client, e.g. its "<hash>-gzip"
+        variant; None when there is none (no header, "*" only).
+        """
+        for tag in (headers.get("if-none-match") or "").split(","):
+            tag = tag.strip().removeprefix("W/")
+            if tag != "*" and ConditionalGetMiddleware.identity_tag(tag) == etag:
+                return tag
+        return None
+
+    def negotiated_tag(self, key, versions: dict, headers: Headers, etag: str) -> str:
+        """
+        ETag a 200 would carry now: etag, or its -<coding> form when a precompressed body would be sent.
+        """
+        coding = negotiate_encoding(headers.get("accept-encoding"), self.cache.variants(key, versions))
+        return etag if coding is None else f'{etag[:-1]}-{coding}"'
+
+    @staticmethod
+    def identity_tag(tag: str) -> str:
+        """
+        ETag of the identity body for an ETag a precompressed variant was sent with ("<hash>-br").
+        """
+        base, dash, coding = tag.rpartition("-")
+        if dash and coding.rstrip('"') in CODINGS:
+            return base + '"'
+        return tag
+
+    @staticmethod
+    def variant(scope, headers: Headers) -> str:
+        """
+        Canonical query string; the Accept header only matters when ?format= is absent.
+        """
+        query = sorted(parse_qsl(scope.get("query_string", b"").decode(), keep_blank_values=True))
+        if any(name == "format" for name, _ in query):
+            return f"{query}"
+        return f"{query}|{headers.get('accept', '')}"
+
+    @staticmethod
+    def validator_headers(etag: str, last_modified: datetime) -> list[tuple[bytes, bytes]]:
+        return [
+            (b"etag", etag.encode()),
+            (b"last-modified", format_datetime(last_modified, usegmt=True).encode()),
+            (b"cache-control", cache_control().encode()),
+            (b"vary", b"Accept, Accept-Encoding"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        path = scope["path"]
+        variant = self.variant(scope, headers)
+        key = (path, variant)
+
+        with stage("cache"):
+            versions = self.current_versions(key)
+        if versions is not None:
+            validators = self.validators(path, variant, versions)
+            if self.not_modified(headers, *validators):
+                # a 304 carries the validator of the representation it confirms, so a client
+                # revalidating a precompressed body gets that body's tag back
+                etag, last_modified = validators
+                etag = self.matching_tag(headers, etag) or self.negotiated_tag(key, versions, headers, etag)
+                await send({"type": "http.response.start", "status": 304, "headers": self.validator_headers(etag, last_modified)})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            with stage("cache"):
+                cached = self.cache.get(key, versions)
+            if cached is not None:
+                response_headers, body = cached.headers, cached.body
+                coding = negotiate_encoding(headers.get("accept-encoding"), cached.variants)
+                if coding is not None:
+                    response_headers, body = cached.encoded(coding)
+                await send({"type": "http.response.start", "status": cached.status, "headers": response_headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        tracker, token = start_tracking()
+        captured = {}
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                if tracker.deps and not tracker.volatile:
+                    self.learn(key, list(tracker.deps))
+                    etag, last_modified = self.validators(path, variant, tracker.deps)
+                    response_headers = MutableHeaders(scope=message)
+                    for name, value in self.validator_headers(etag, last_modified):
+                        response_headers[name.decode()] = value.decode()
+                    # streamed bodies (no content-length) are not buffered into the cache
+                    if "content-length" in response_headers:
+                        captured.update(start=message, body=[])
+                elif tracker.volatile:
+                    self.route_deps.pop(key, None)
+
+            elif message["type"] == "http.response.body" and "body" in captured:
+                captured["body"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    if versions is None:
+                        self.cache.record_miss()
+                    self.cache.put(key, CachedResponse(
+                        versions=dict(tracker.deps),
+                        status=captured["start"]["status"],
+                        headers=list(captured["start"]["headers"]),
+                        body=b"".join(captured.pop("body")),
+                    ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_validators)
+        finally:
+            stop_tracking(token)
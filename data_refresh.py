@@ -1,4 +1,4 @@
-from utils import refresh_from_registry
+from refresh import refresh_from_registry
 
 def main():
     refresh_from_registry()
@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+import threading
+import numpy as np
+import pandas as pd
+from metrics import staged
+from store import STORE, Series
+
+
+CPI_CATEGORY = "inflation_and_prices"
+CPI_SERIES = "CPIAUCSL"
+
+
+def month_ordinals(dates) -> np.ndarray:
+    """
+    Months since 1970-01 for an array of dates (any datetime64 unit).
+    """
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[M]").astype("i8")
+
+
+@dataclass
+class Deflator:
+    """
+    CPI (CPIAUCSL) aligned to a monthly index, with ratio vectors cached per base month.
+
+    factors(dates, base) gives cpi[base] / cpi[month(date)] for every date, so
+    real = nominal * factors is one vectorized multiply with no merge.
+    """
+    months: np.ndarray
+    cpi: np.ndarray
+    version: tuple
+    _ratios: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_series(cls, series: Series) -> "Deflator":
+        cpi = np.asarray(series.values, dtype="float64")
+        keep = ~np.isnan(cpi)
+        return cls(months=month_ordinals(series.dates[keep]), cpi=cpi[keep], version=series.version)
+
+    def positions(self, dates) -> np.ndarray:
+        """
+        Index into the CPI months for each date, -1 where there is no CPI observation.
+        """
+        months = month_ordinals(dates)
+        if not len(self.months):
+            return np.full(len(months), -1)
+        pos = np.searchsorted(self.months, months)
+        pos = np.minimum(pos, len(self.months) - 1)
+        return np.where(self.months[pos] == months, pos, -1)
+
+    def has_month(self, date) -> bool:
+        return self.positions([pd.Timestamp(date)])[0] >= 0
+
+    def ratio(self, base_pos: int, invert: bool = False) -> np.ndarray:
+        """
+        cpi[base] / cpi for every CPI month (cpi / cpi[base] with invert=True), computed once per base.
+        """
+        key = (base_pos, invert)
+        with self._lock:
+            vector = self._ratios.get(key)
+        if vector is None:
+            vector = self.cpi / self.cpi[base_pos] if invert else self.cpi[base_pos] / self.cpi
+            with self._lock:
+                self._ratios[key] = vector
+        return vector
+
+    def factors(self, dates, base=None, invert: bool = False) -> np.ndarray:
+        """
+        Per-date deflation factors into base-month dollars. base defaults to the latest CPI month.
+        Dates without CPI, or a base month without CPI, give NaN.
+        """
+        pos = self.positions(dates)
+        base_pos = len(self.cpi) - 1 if base is None else self.positions([pd.Timestamp(base)])[0]
+        if base_pos < 0:
+            return np.full(len(pos), np.nan)
+
+        vector = self.ratio(int(base_pos), invert)
+        return np.where(pos >= 0, vector[pos], np.nan)
+
+    def factor_matrix(self, dates, bases) -> np.ndarray:
+        """
+        (dates x bases) matrix of cpi[base] / cpi[month(date)], one column per base date.
+        NaN where the date or the base month has no CPI.
+        """
+        pos = self.positions(dates)
+        base_pos = self.positions(np.asarray(bases, dtype="datetime64[ns]"))
+
+        cpi_t = np.where(pos >= 0, self.cpi[pos], np.nan) if len(self.cpi) else np.full(len(pos), np.nan)
+        cpi_b = np.where(base_pos >= 0, self.cpi[base_pos], np.nan) if len(self.cpi) else np.full(len(base_pos), np.nan)
+
+        return cpi_b[None, :] / cpi_t[:, None]
+
+
+_current: Deflator = None
+_current_lock = threading.Lock()
+
+
+def get_deflator() -> Deflator:
+    """
+    Shared deflator, rebuilt (and its base-month cache dropped) only when CPI is refreshed.
+    """
+    global _current
+    series = STORE.get(CPI_CATEGORY, CPI_SERIES)
+    with _current_lock:
+        if _current is None or _current.version != series.version:
+            _current = Deflator.from_series(series)
+        return _current
+
+
+@staged("transform")
+def add_real_columns(df: pd.DataFrame, base=None, columns: list[str] = None) -> pd.DataFrame:
+    """
+    Add '<col> (Real)' columns in base-month dollars (default: latest CPI month), rounded to cents.
+    Existing '(Real)' columns are recomputed rather than deflated again.
+    """
+    if columns is None:
+        columns = [
+            c for c in df.columns
+            if c != "Date" and not c.endswith(" (Real)") and pd.api.types.is_numeric_dtype(df[c])
+        ]
+    if df.empty or not columns:
+        return df
+
+    factors = get_deflator().factors(df["Date"].to_numpy(), base=base)
+    for col in columns:
+        df[f"{col} (Real)"] = np.round(df[col].to_numpy(dtype="float64") * factors, 2)
+
+    return df
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+import os
+import threading
+import numpy as np
+from metrics import staged
+from store import Series
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of n_out points that keep the visual shape of (x, y).
+
+    First and last points are always kept; the rest are split into n_out - 2 buckets and
+    from each the point forming the largest triangle with the previously kept point and
+    the average of the next bucket is taken. Bucket bounds and averages are computed in
+    one pass; only the per-bucket choice (which depends on the previous one) loops.
+    """
+    size = len(x)
+    if n_out >= size or n_out < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:size - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:size - 1], edges[:-1]) / counts
+    # the point each bucket is weighed against: next bucket's average, the last point for the final bucket
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def lttb(series: Series, n_out: int) -> Series:
+    """
+    Series decimated to at most n_out observations with LTTB. Missing values are left out.
+    """
+    values = np.asarray(series.values, dtype="float64")
+    keep = ~np.isnan(values)
+    dates, values = series.dates[keep], values[keep]
+
+    # x in ns since the first observation keeps float64 precision for long daily series
+    x = (dates.view("i8") - (dates.view("i8")[0] if len(dates) else 0)).astype("float64")
+    idx = lttb_indices(x, values, n_out)
+    return replace(series, dates=dates[idx], values=values[idx])
+
+
+# upper bound for ?max_points=; more than this is no longer a chart-sized response
+MAX_POINTS_LIMIT = 10_000
+
+
+def _default_max_entries() -> int:
+    return int(os.getenv("DISCO_DOWNSAMPLE_CACHE_ENTRIES", "1024"))
+
+
+@dataclass
+class Downsampler:
+    """
+    LTTB results cached per (series, freq, agg, date range, max_points), LRU-bounded by
+    entry count. The range is the slice's first and last date, so requests whose bounds
+    select the same rows share an entry; it is reused only while the series version matches.
+    """
+    max_entries: int = field(default_factory=_default_max_entries)
+    _cache: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    hits: int = 0
+    misses: int = 0
+
+    @staged("transform")
+    def get(self, series: Series, max_points: int, key: tuple = ()) -> Series:
+        """
+        series (already resampled and range-sliced) downsampled to max_points. key tells
+        apart derived copies of one series, e.g. (freq, agg).
+        """
+        if series.rows <= max_points:
+            return series
+
+        span = (int(series.index[0]), int(series.index[-1]))
+        cache_key = (series.category, series.series_id, *key, span, max_points)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None and cached[0] == series.version:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        result = lttb(series, max_points)
+
+        with self._lock:
+            self._cache[cache_key] = (series.version, result)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+DOWNSAMPLER = Downsampler()
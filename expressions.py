@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import ast
+import functools
+import os
+import threading
+import numpy as np
+import pandas as pd
+from catalog import CATALOG, Catalog
+from metrics import staged
+from resample import FREQUENCIES, RESAMPLER
+from store import Series
+
+
+MAX_EXPR_LENGTH = 500
+MAX_NODES = 100
+MAX_DEPTH = 32
+
+BINARY = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}
+UNARY = {ast.USub: "-", ast.UAdd: "+"}
+
+_BINARY_UFUNCS = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide, "**": np.power}
+_UNARY_UFUNCS = {"-": np.negative, "+": np.positive}
+
+
+@dataclass(frozen=True)
+class Plan:
+    """
+    A parsed expression: the series ids it reads (in order of first use) and a postfix
+    program of ("series", id), ("const", x), ("unary", op) and ("binary", op) steps.
+    """
+    expr: str
+    names: tuple
+    program: tuple
+
+
+def parse(expr: str) -> Plan:
+    """
+    Parse arithmetic (+ - * / **, unary minus, parentheses, numbers) over series ids.
+    Raises ValueError for anything else.
+    """
+    if len(expr) > MAX_EXPR_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPR_LENGTH} characters")
+    try:
+        return _parse(expr)
+    except RecursionError:
+        raise ValueError(f"Expression nested more than {MAX_DEPTH} levels deep")
+
+
+def _parse(expr: str) -> Plan:
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+
+    program, names = [], []
+
+    def visit(node, depth: int = 0):
+        if len(program) > MAX_NODES:
+            raise ValueError(f"Expression has more than {MAX_NODES} terms")
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Expression nested more than {MAX_DEPTH} levels deep")
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY:
+            visit(node.left, depth + 1)
+            visit(node.right, depth + 1)
+            program.append(("binary", BINARY[type(node.op)]))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in UNARY:
+            visit(node.operand, depth + 1)
+            program.append(("unary", UNARY[type(node.op)]))
+        elif isinstance(node, ast.Name):
+            if node.id not in names:
+                names.append(node.id)
+            program.append(("series", node.id))
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            program.append(("const", float(node.value)))
+        else:
+            raise ValueError(f"Unsupported syntax in expression: {ast.unparse(node)}")
+
+    visit(tree.body)
+    if not names:
+        raise ValueError("Expression must use at least one series id")
+    return Plan(expr=ast.unparse(tree.body), names=tuple(names), program=tuple(program))
+
+
+def evaluate(plan: Plan, columns: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Run a plan's program on aligned float64 arrays. Division by zero and the like give NaN.
+    """
+    stack = []
+    with np.errstate(all="ignore"):
+        for kind, arg in plan.program:
+            if kind == "series":
+                stack.append(columns[arg])
+            elif kind == "const":
+                stack.append(arg)
+            elif kind == "unary":
+                stack.append(_UNARY_UFUNCS[arg](stack.pop()))
+            else:
+                right, left = stack.pop(), stack.pop()
+                stack.append(_BINARY_UFUNCS[arg](left, right))
+
+    result = np.asarray(stack.pop(), dtype="float64")
+    return np.where(np.isfinite(result), result, np.nan)
+
+
+def native_freq(dates: np.ndarray) -> str:
+    """
+    Frequency of a series guessed from the median spacing of its dates.
+    """
+    if len(dates) < 2:
+        return "A"
+    days = float(np.median(np.diff(dates.view("i8")))) / 86_400e9
+    for freq, limit in (("D", 4), ("W", 10), ("M", 45), ("Q", 135)):
+        if days <= limit:
+            return freq
+    return "A"
+
+
+@dataclass
+class _Aligned:
+    freq: str
+    dates: np.ndarray
+    columns: dict
+
+
+def _default_max_entries() -> int:
+    return int(os.getenv("DISCO_EXPRESSION_CACHE_ENTRIES", "256"))
+
+
+@dataclass
+class ExpressionEngine:
+    """
+    Evaluates expressions over registry series (/compute?expr=).
+
+    Inputs are resampled to one frequency (the coarsest among them unless one is given)
+    and inner-joined on period start. Parsed plans are cached per expression text and
+    aligned arrays per (series, freq, agg, versions), so a repeated dashboard expression
+    is one vectorized pass over cached arrays.
+    """
+    catalog: Catalog = field(default_factory=lambda: CATALOG)
+    max_entries: int = field(default_factory=_default_max_entries)
+    _plans: OrderedDict = field(default_factory=OrderedDict)
+    _aligned: OrderedDict = field(default_factory=OrderedDict)
+    _freqs: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    plan_hits: int = 0
+    aligned_hits: int = 0
+    aligned_misses: int = 0
+
+    def _remember(self, cache: OrderedDict, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def plan(self, expr: str) -> Plan:
+        """
+        Parsed plan for expr, checked against the registry. Raises ValueError for bad
+        syntax and KeyError naming the unknown series ids.
+        """
+        with self._lock:
+            plan = self._plans.get(expr)
+            if plan is not None:
+                self._plans.move_to_end(expr)
+                self.plan_hits += 1
+                return plan
+
+        plan = parse(expr)
+        entries = self.catalog.entries()
+        unknown = [name for name in plan.names if name not in entries]
+        if unknown:
+            raise KeyError(f"Unknown series: {', '.join(unknown)}")
+
+        self._remember(self._plans, expr, plan)
+        return plan
+
+    def freq_of(self, series: Series) -> str:
+        key = (series.category, series.series_id)
+        with self._lock:
+            cached = self._freqs.get(key)
+        if cached is not None and cached[0] == series.version:
+            return cached[1]
+        freq = native_freq(series.dates)
+        with self._lock:
+            self._freqs[key] = (series.version, freq)
+        return freq
+
+    @staged("merge")
+    def align(self, names: tuple, freq: str = None, agg: str = "mean") -> _Aligned:
+        """
+        The named series resampled to freq (default: the coarsest of their native
+        frequencies) and restricted to the periods they all have.
+        """
+        names = tuple(sorted(names))
+        inputs = [self.catalog.series(self.catalog.entry(name)) for name in names]
+        if freq is None:
+            freq = max((self.freq_of(series) for series in inputs), key=FREQUENCIES.index)
+
+        key = (names, freq, agg, tuple(series.version for series in inputs))
+        with self._lock:
+            cached = self._aligned.get(key)
+            if cached is not None:
+                self._aligned.move_to_end(key)
+                self.aligned_hits += 1
+                return cached
+            self.aligned_misses += 1
+
+        resampled = [RESAMPLER.get(series, freq, agg) for series in inputs]
+        common = functools.reduce(
+            lambda left, right: np.intersect1d(left, right, assume_unique=True),
+            [series.index for series in resampled],
+        )
+
+        columns = {}
+        for name, series in zip(names, resampled):
+            positions = np.searchsorted(series.index, common)
+            columns[name] = np.asarray(series.values, dtype="float64")[positions]
+
+        aligned = _Aligned(freq=freq, dates=common.view("datetime64[ns]"), columns=columns)
+        self._remember(self._aligned, key, aligned)
+        return aligned
+
+    @staged("transform")
+    def frame(self, plan: Plan, start_date=None, end_date=None, freq=None, agg="mean", name: str = None) -> pd.DataFrame:
+        """
+        Date + result frame for a plan over [start_date, end_date]; periods where the
+        result is undefined (missing input, division by zero) are left out.
+        """
+        column = name or plan.expr
+        if column == "Date":
+            raise ValueError("The result column can't be named 'Date'")
+        aligned = self.align(plan.names, freq, agg)
+
+        lo = 0 if not start_date else int(np.searchsorted(aligned.dates, np.datetime64(start_date, "ns"), side="left"))
+        hi = len(aligned.dates) if not end_date else int(np.searchsorted(aligned.dates, np.datetime64(end_date, "ns"), side="right"))
+        columns = {n: values[lo:hi] for n, values in aligned.columns.items()}
+        result = evaluate(plan, columns)
+
+        keep = ~np.isnan(result)
+        return pd.DataFrame({"Date": aligned.dates[lo:hi][keep], column: result[keep]})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "plans": len(self._plans),
+                "plan_hits": self.plan_hits,
+                "aligned": len(self._aligned),
+                "aligned_hits": self.aligned_hits,
+                "aligned_misses": self.aligned_misses,
+            }
+
+
+EXPRESSIONS = ExpressionEngine()
@@ -1,735 +1,483 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+from dataclasses import dataclass
+from typing import Annotated
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+import os
 import pandas as pd
-from utils import sanitize_for_json
+from store import STORE, ViewUnavailable, set_as_of
+from serialize import STREAM_FORMATS, WireFormat, negotiate, render, stream_records
+from conditional import ConditionalGetMiddleware
+from metrics import TimingMiddleware, exposition
+from response_cache import RESPONSE_CACHE
+from deflator import add_real_columns, get_deflator
+from compute import COMPUTE
+import mortgage
+from resample import RESAMPLER, check_agg, normalize_freq
+from downsample import DOWNSAMPLER, MAX_POINTS_LIMIT
+from expressions import EXPRESSIONS, Plan
+from catalog import CATALOG, CatalogEntry
+from warmup import READINESS, warm
+from refresh import read_refresh_report
+from vintages import VINTAGES, NoVintage
 import modules.inflation_and_prices as inflation_and_prices
 import modules.demographics as demographics
 import modules.commodities as commodities
 import modules.rates as rates
-import modules.housing as housing
-import modules.delinquency as dq
-import modules.money_aggregates as money_aggregates
-import modules.output_and_growth as output_and_growth
 import modules.income_and_spending as income_and_spending
-import modules.wages_and_employment as wages_and_employment
 
 
-app = FastAPI(title="DiscoRover API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm in the background: the server accepts connections right away and /ready flips when done
+    warming = asyncio.get_running_loop().run_in_executor(None, warm, READINESS)
+    yield
+    if not warming.done():
+        warming.cancel()
+    COMPUTE.shutdown(wait=False)
 
-@app.get("/")
-def root():
-    return {"message": "DiscoRover API", "available_datasets": "No datasets available"}
-
-
-@app.get("/cpi")
-def get_cpi(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """Consumer Price Index for All Urban Consumers (CPIAUCSL)."""
-    try: 
-        df:pd.DataFrame = inflation_and_prices._fetch_cpi(start_date=start_date, end_date=end_date)
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/scale-for-inflation")
-def scale_for_inflation_route(
-    from_year: int = Query(1980, description="Year to scale from"),
-    to_year: int = Query(2025, description="Year to scale to"),
-    amount: float = Query(100.0, description="Amount to scale")
-):
-    """
-    Scale a monetary amount from `from_year` to `to_year` using CPI data.
-    """
-    scaled_value = inflation_and_prices._fetch_scaled_with_cpi(from_year=from_year, to_year=to_year, amount=amount)
-    return {"from_year": from_year, "to_year": to_year, "original_amount": amount, "scaled_amount": scaled_value}
-
-
-@app.get("/pce")
-def get_pce(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
-):
-    """Consumer Price Index for All Urban Consumers (CPIAUCSL)."""
-    try: 
-        df:pd.DataFrame = inflation_and_prices._fetch_pce(start_date=start_date, end_date=end_date) 
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/households")
-def get_households(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
-):
-    """Total Households (TTLHH)"""
-    try: 
-        df:pd.DataFrame = demographics._fetch_us_households(start_date=start_date, end_date=end_date)
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/population")
-def get_population(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
-):
-    """Total Households (TTLHH)"""
-    try: 
-        df:pd.DataFrame = demographics._fetch_us_population(start_date=start_date, end_date=end_date)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/us-birthrate")
-def get_us_birthrate(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
+async def vintage(
+    as_of: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Serve the data as it was stored at the end of this day (YYYY-MM-DD, UTC)"),
 ):
-    """Crude Birth Rate for the United States (SPDYNCBRTINUSA)"""
-    try: 
-        df:pd.DataFrame = demographics._fetch_us_birthrate(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/us-births-deaths-by-race")
-def get_birth_death_data(
-    start_year: int | None = Query(None, description="Filter start year (e.g. 2000)"),
-    end_year: int | None = Query(None, description="Filter end year (e.g. 2023)"),
-    race: str | None = Query(None, description="Race/Ethnicity filter ('All', 'White', 'Black', 'Hispanic')")
-):
-    """Births and Deaths by Race/Ethnicity (CDC)"""
+    """Shared ?as_of= parameter, on every route: reads in the request come from the recorded vintages."""
+    if as_of is None:
+        return
     try:
-        df: pd.DataFrame = demographics._fetch_birth_death_data(start_year=start_year, end_year=end_year, race=race)
-        return JSONResponse(content=df.to_dict(orient="records"))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/egg-prices")
-def get_egg_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """Average Price: Eggs, Grade A, Large (Cost per Dozen) in U.S. City Average (APU0000708111)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_egg_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/milk-prices")
-def get_milk_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Milk, Fresh, Whole, Fortified (Cost per Gallon/3.8 Liters) in U.S. City Average (APU0000709112)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_milk_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/ground-beef-prices")
-def get_ground_beef_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Ground Beef, 100% Beef (Cost per Pound/453.6 Grams) in U.S. City Average (APU0000703112)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_ground_beef_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/bread-prices")
-def get_bread_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Bread, White, Pan (Cost per Pound/453.6 Grams) in U.S. City Average (APU0000702111)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_bread_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/chicken-prices")
-def get_chicken_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Chicken Breast, Boneless (Cost per Pound/453.6 Grams) in U.S. City Average (APU0000FF1101)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_chicken_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-
-@app.get("/gas-prices")
-def get_gas_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Gasoline, Unleaded Regular (Cost per Gallon/3.785 Liters) in U.S. City Average (APU000074714)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_gas_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        pd.Timestamp(as_of)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid as_of date '{as_of}'")
+    set_as_of(as_of)
+
+
+app = FastAPI(title="DiscoRover API", version="0.1.0", lifespan=lifespan, dependencies=[Depends(vintage)])
+app.add_middleware(ConditionalGetMiddleware)
+# added last so it wraps the conditional/cache layer and times 304s and cache hits too
+app.add_middleware(TimingMiddleware)
+
+# series at most this long are served on the event loop when already in memory
+INLINE_MAX_ROWS = int(os.getenv("DISCO_INLINE_MAX_ROWS", "20000"))
+# rows encoded per chunk with ?stream=
+STREAM_BLOCK_ROWS = int(os.getenv("DISCO_STREAM_BLOCK_ROWS", "2000"))
+
+
+@dataclass
+class RealDollars:
+    """CPI base month requested with ?real=true (None means the latest CPI month)."""
+    base: str | None = None
+
+
+async def real_dollars(
+    real: bool = Query(False, description="Add CPI-deflated '(Real)' columns"),
+    base: str | None = Query(None, pattern=r"^\d{4}-\d{2}$", description="Base month for real dollars (YYYY-MM), default latest CPI"),
+) -> RealDollars | None:
+    """Shared ?real=&base= parameters for series routes."""
+    if not real:
+        return None
+    if base is not None and not get_deflator().has_month(f"{base}-01"):
+        raise HTTPException(status_code=400, detail=f"No CPI observation for base month {base}")
+    return RealDollars(base=f"{base}-01" if base else None)
+
+
+@dataclass
+class Resampling:
+    """Server-side resampling requested with ?freq=&agg= (freq None keeps the native frequency)."""
+    freq: str | None = None
+    agg: str = "mean"
+
+
+async def resampling(
+    freq: str | None = Query(None, description="Resample to D, W, M, Q or A, rows labelled by period start (default: native frequency)"),
+    agg: str = Query("mean", description="Aggregation when resampling: mean, last, first, max, min or sum"),
+) -> Resampling:
+    """Shared ?freq=&agg= parameters for series routes."""
+    if freq is None:
+        return Resampling()
+    try:
+        return Resampling(freq=normalize_freq(freq), agg=check_agg(agg))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/electric-kwh-prices")
-def get_electric_kwh_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Electricity per Kilowatt-Hour in U.S. City Average (APU000072610)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_electric_prices(start_date=start_date, end_date=end_date)   
+async def wire_format(
+    request: Request,
+    format: str | None = Query(None, description="Response format: json, columns, csv, arrow or msgpack (default: Accept header, then json)"),
+) -> WireFormat:
+    """Shared ?format= / Accept negotiation for data routes."""
+    try:
+        return negotiate(format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=406, detail=str(e))
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+async def streaming(
+    stream: str | None = Query(None, description="Stream rows in blocks: ndjson (one record per line) or json (array sent in chunks); overrides format"),
+) -> str | None:
+    """Shared ?stream= parameter for series routes."""
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream mode '{stream}'. Valid options: {list(STREAM_FORMATS)}")
+    return stream
 
-@app.get("/coffee-prices")
-def get_coffee_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Coffee, 100%, Ground Roast, All Sizes (Cost per Pound/453.6 Grams) in U.S. City Average (APU0000717311)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_coffee_prices(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-
-@app.get("/bacon-prices")
-def get_bacon_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Average Price: Bacon, Sliced (Cost per Pound/453.6 Grams) in U.S. City Average (APU0000704111)"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_bacon_sliced_prices(start_date=start_date, end_date=end_date)   
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def downsampling(
+    max_points: int | None = Query(None, description=f"Downsample to at most this many points (3-{MAX_POINTS_LIMIT}) with LTTB, keeping the chart shape"),
+) -> int | None:
+    """Shared ?max_points= parameter for series routes."""
+    if max_points is not None and not 3 <= max_points <= MAX_POINTS_LIMIT:
+        raise HTTPException(status_code=400, detail=f"max_points must be between 3 and {MAX_POINTS_LIMIT}")
+    return max_points
 
 
-@app.get("/all-commodity-prices")
-def get_all_commodity_prices(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Aggregated Dataset with Average Price:  All Commodities available in API"""
-    try: 
-        df:pd.DataFrame = commodities._fetch_all_commodity_prices(start_date=start_date, end_date=end_date)   
+def apply_real(df: pd.DataFrame, real: RealDollars | None) -> pd.DataFrame:
+    if real is None:
+        return df
+    return add_real_columns(df, base=real.base)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/")
+def root():
+    return {"message": "DiscoRover API", "available_datasets": "No datasets available"}
 
 
-@app.get("/mortgage-30yr")
-def get_30yr_mortgage_rates(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('A', description="Frequency period")
-):
-    """
-    30-Year Fixed Rate Mortgage Average in the United States (MORTGAGE30US)
-    """
-    try: 
-        df:pd.DataFrame = rates._fetch_30yr_mortgage_rates(start_date=start_date, end_date=end_date)
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 while warming or if the compute pool failed to start; series or views that failed to load are listed under status "degraded" (still 200) and retried on each call."""
+    READINESS.recheck()
+    return JSONResponse(READINESS.to_dict(), status_code=200 if READINESS.ready else 503)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/store-stats")
+def get_store_stats():
+    """Hit/miss counts and memory use of the in-process series store."""
+    return STORE.stats()
 
-@app.get("/mortgage-15yr")
-def get_15yr_mortgage_rates(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('A', description="Frequency period")
-):
-    """
-    15-Year Fixed Rate Mortgage Average in the United States (MORTGAGE15US)
-    """
-    try: 
-        df:pd.DataFrame = rates._fetch_15yr_mortgage_rates(start_date=start_date, end_date=end_date)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: per-route and per-stage latency, cache hit ratios, refresh timings, series sizes."""
+    text = exposition(STORE.stats(), RESPONSE_CACHE.stats(), RESAMPLER.stats(), read_refresh_report(STORE.root))
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
-@app.get("/mortgage-all")
-def get_all_mortgage_rates(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('A', description="Frequency period")
-):
-    """
-    Fetch both 30-year and 15-year mortgage rates and merge them into a single DataFrame.
-    """
-    try: 
-        df:pd.DataFrame = rates._fetch_all_mortgage_rates(start_date=start_date, end_date=end_date, freq=freq)
+@app.get("/cache-stats")
+def get_cache_stats():
+    """Hit rate, size and invalidation counts of the response cache, plus resampling, downsampling, vintage and expression cache counters."""
+    return {
+        "responses": RESPONSE_CACHE.stats(),
+        "resampled": RESAMPLER.stats(),
+        "downsampled": DOWNSAMPLER.stats(),
+        "vintages": VINTAGES.stats(),
+        "expressions": EXPRESSIONS.stats(),
+    }
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+def build_series_response(entry: CatalogEntry, start_date, end_date, resample: Resampling, real: RealDollars | None, fmt: WireFormat, max_points: int | None = None):
+    try:
+        df = CATALOG.frame(entry, start_date=start_date, end_date=end_date, freq=resample.freq, agg=resample.agg, max_points=max_points)
 
-@app.get("/sofr")
-def get_sofr(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query(None, description="Frequency Period")
-):
-    """Secured Overnight Financing Rate (SOFR)"""
-    try: 
-        df:pd.DataFrame = rates._fetch_sofr(start_date=start_date, end_date=end_date)   
+        df = apply_real(df, real)
 
-        return JSONResponse(content=sanitize_for_json(df))
+        return render(df, fmt)
+    except NoVintage as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/fed-funds")
-def get_fed_funds_rate(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """Federal Funds Effective Rate (FEDFUNDS)"""
-    try: 
-        df:pd.DataFrame = rates._fetch_fed_funds_rate(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
+def build_series_stream(entry: CatalogEntry, start_date, end_date, resample: Resampling, real: RealDollars | None, stream: str, max_points: int | None = None):
+    try:
+        names, blocks = CATALOG.blocks(
+            entry, start_date=start_date, end_date=end_date, freq=resample.freq, agg=resample.agg,
+            real=real is not None, base=real.base if real is not None else None, block_rows=STREAM_BLOCK_ROWS,
+            max_points=max_points,
+        )
+    except NoVintage as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
 
-@app.get("/mspus")
-def get_mspus(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
-):
-    """
-    Median Sales Price of Houses Sold for the United States (MSPUS)
-    """
-    try: 
-        df:pd.DataFrame = housing._fetch_median_home_prices(start_date=start_date, end_date=end_date)
+    return StreamingResponse(stream_records(names, blocks, stream), media_type=STREAM_FORMATS[stream])
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
-
-@app.get("/mspnus")
-def get_msp_new_homes(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
-):
+async def series_response(entry: CatalogEntry, start_date, end_date, resample: Resampling, real: RealDollars | None, fmt: WireFormat, stream: str | None = None, max_points: int | None = None):
     """
-    Median Sales Price for New Houses Sold in the United States (MSPNHSUS)
+    Cache hits are sliced and encoded right on the event loop; series that still have to
+    be loaded from disk (or are very long) go to the thread pool. With ?stream= the body
+    is encoded block by block while it is sent.
     """
-    try: 
-        df:pd.DataFrame = housing._fetch_median_home_price_new(start_date=start_date, end_date=end_date)
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/cshi")
-def get_caseshiller_homes_index(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """S&P CoreLogic Case-Shiller U.S. National Home Price Index (CSUSHPINSA)"""
-    try: 
-        df:pd.DataFrame = housing._fetch_caseshiller_home_price_index(start_date=start_date, end_date=end_date) 
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/new-homes-ns")
-def get_new_homes_ns(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """New Houses for Sale by Stage of Construction, Not Started (NHFSEPNTS)"""
-    try: 
-        df:pd.DataFrame = housing._fetch_new_homes_ns(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/new-homes-uc")
-def get_new_homes_uc(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """New Houses for Sale (Units) by Stage of Construction, Under Construction (NHFSEPUCS)"""
-    try: 
-        df:pd.DataFrame = housing._fetch_new_homes_uc(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/new-homes-comp")
-def get_new_homes_comp(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """New Houses for Sale (Units) by Stage of Construction, Under Construction (NHFSEPUCS)"""
-    try: 
-        df:pd.DataFrame = housing._fetch_new_homes_comp(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/new-sf-homes-for-sale")
-def get_new_sf_homes_for_sale(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
-):
-    """New One Family Houses for Sale in the United States (HNFSUSNSA)"""
-    try: 
-        df:pd.DataFrame = housing._fetch_new_sf_homes_for_sale(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/dq-credit-cards")
-def get_dq_credit_cards(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('Q', description="Frequency period")
-):
-    """Delinquency Rate on Credit Card Loans, All Commercial Banks (DRCCLACBS)"""
-    try: 
-        df:pd.DataFrame = dq._fetch_dq_credit_cards(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-
-@app.get("/dq-consumer-loans")
-def get_dq_consumer_loans(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('Q', description="Frequency period")
-):
-    """Delinquency Rate on Consumer Loans, All Commercial Banks (DRCLACBS)"""
-    try: 
-        df:pd.DataFrame = dq._fetch_dq_consumer_loans(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/dq-sfr-mtg")
-def get_dq_sfr_mortgages(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('Q', description="Frequency period")
-):
-    """Delinquency Rate on Single-Family Residential Mortgages, Booked in Domestic Offices, All Commercial Banks (DRSFRMACBS)"""
-    try: 
-        df:pd.DataFrame = dq._fetch_dq_sfr_mortgages(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/dq-all-loans")
-def get_dq_all_loans(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('Q', description="Frequency period")
-):
-    """Delinquency Rate on All Loans, All Commercial Banks (DRALACBS)"""
-    try: 
-        df:pd.DataFrame = dq._fetch_dq_all_loans(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/m2-supply")
-def get_m2_supply(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq: str = Query(None, description="Frequency period")
-):
-    """M2 (WM2NS)"""
-    try: 
-        df:pd.DataFrame = money_aggregates._fetch_m2_supply(start_date=start_date, end_date=end_date)   
+    if stream is not None:
+        build, args = build_series_stream, (entry, start_date, end_date, resample, real, stream, max_points)
+    else:
+        build, args = build_series_response, (entry, start_date, end_date, resample, real, fmt, max_points)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    cached = STORE.cached(entry.category, entry.id)
+    if cached is not None and cached.rows <= INLINE_MAX_ROWS:
+        return build(*args)
+    return await run_in_threadpool(build, *args)
 
 
-@app.get("/m2-velocity")
-def get_m2_velocity(
+@app.get("/series/{series_id}")
+async def get_series(
+    series_id: str,
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq: str = Query(None, description="Frequency period")
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
+    stream: str | None = Depends(streaming),
+    max_points: int | None = Depends(downsampling),
 ):
-    """Velocity of M2 Money Stock (M2V)"""
-    try: 
-        df:pd.DataFrame = money_aggregates._fetch_m2_velocity(start_date=start_date, end_date=end_date)   
+    """Any series in data/registry.json by FRED id, in the units declared there."""
+    try:
+        entry = CATALOG.entry(series_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown series '{series_id}'")
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await series_response(entry, start_date, end_date, resample, real, fmt, stream, max_points)
 
 
-@app.get("/gdp")
-def get_gdp(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq: str = Query(None, description="Frequency period")
-):
-    """Gross Domestic Product (GDP)"""
-    try: 
-        df:pd.DataFrame = output_and_growth._fetch_gdp(start_date=start_date, end_date=end_date)   
+def series_alias(entry: CatalogEntry):
+    """Route handler serving one registry series under its own path (e.g. /sofr)."""
+    async def get_alias(
+        start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
+        end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
+        resample: Resampling = Depends(resampling),
+        real: RealDollars | None = Depends(real_dollars),
+        fmt: WireFormat = Depends(wire_format),
+        stream: str | None = Depends(streaming),
+        max_points: int | None = Depends(downsampling),
+    ):
+        return await series_response(entry, start_date, end_date, resample, real, fmt, stream, max_points)
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    get_alias.__doc__ = entry.description
+    return get_alias
 
 
-@app.get("/vehicle-insurance")
-def get_vehicle_ins_premiums(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """Expenditures: Vehicle Insurance: All Consumer Units (CXU500110LB0101M)"""
-    try: 
-        df:pd.DataFrame = income_and_spending._fetch_vehicle_ins_premiums(start_date=start_date, end_date=end_date) 
+# the per-series paths predate /series/{id}; they are declared with "path" in the registry
+for _entry in CATALOG.entries().values():
+    if _entry.path:
+        app.add_api_route(_entry.path, series_alias(_entry), methods=["GET"], name=f"series_{_entry.id}")
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+def build_expression_response(plan: Plan, name, start_date, end_date, resample: Resampling, real: RealDollars | None, fmt: WireFormat):
+    try:
+        df = EXPRESSIONS.frame(plan, start_date=start_date, end_date=end_date, freq=resample.freq, agg=resample.agg, name=name)
 
-@app.get("/pce-healthcare")
-def get_pce_healthcare(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """PCE Services: Healthcare (DHLCRC1Q027SBEA)."""
-    try: 
-        df:pd.DataFrame = income_and_spending._fetch_pce_healthcare(start_date=start_date, end_date=end_date) 
+        df = apply_real(df, real)
 
-        return JSONResponse(content=sanitize_for_json(df))
+        return render(df, fmt)
+    except NoVintage as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/hh-ops")
-def get_household_ops(
+@app.get("/compute")
+async def compute_expression(
+    expr: str = Query(..., description="Arithmetic over registry series ids, e.g. MSPUS/MEFAINUSA646N or (M2SL/GDP)*100"),
+    name: str | None = Query(None, description="Name of the result column (default: the expression)"),
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-):
-    """Expenditures: Household Operations: All Consumer Units (CXUHHOPERLB0101M)"""
-    try: 
-        df:pd.DataFrame = income_and_spending._fetch_houshold_ops_spend(start_date=start_date, end_date=end_date) 
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/median-family-income")
-def get_median_income(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
     """
-    Median Annual Family Income in the United States (MEFAINUSA646N) | default freq= A |
+    Derived series evaluated on the server. Inputs are resampled to the coarsest of their
+    frequencies (or ?freq=) with ?agg= and joined on the periods they share.
     """
-    try: 
-        df:pd.DataFrame = wages_and_employment._fetch_median_family_income(start_date=start_date, end_date=end_date)
+    if name == "Date":
+        raise HTTPException(status_code=400, detail="The result column can't be named 'Date'")
+    try:
+        plan = EXPRESSIONS.plan(expr)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
 
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    args = (plan, name, start_date, end_date, resample, real, fmt)
+    if all(STORE.cached(CATALOG.entry(n).category, n) is not None for n in plan.names):
+        return build_expression_response(*args)
+    return await run_in_threadpool(build_expression_response, *args)
 
 
-@app.get("/rdpi")
-def get_rdpi(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)")
+@app.get("/scale-for-inflation")
+def scale_for_inflation_route(
+    from_year: int = Query(1980, description="Year to scale from"),
+    to_year: int = Query(2025, description="Year to scale to"),
+    amount: float = Query(100.0, description="Amount to scale")
 ):
     """
-    Real Disposable Personal Income (DSPI)
+    Scale a monetary amount from `from_year` to `to_year` using CPI data.
     """
-    try: 
-        df:pd.DataFrame = wages_and_employment._fetch_median_family_income(start_date=start_date, end_date=end_date)
-
-        return JSONResponse(content=sanitize_for_json(df))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    scaled_value = inflation_and_prices._fetch_scaled_with_cpi(from_year=from_year, to_year=to_year, amount=amount)
+    return {"from_year": from_year, "to_year": to_year, "original_amount": amount, "scaled_amount": scaled_value}
 
 
-@app.get("/unrate")
-def get_unrate(
-    start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
-    end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq: str = Query(None, description="Frequency period")
+@app.get("/us-births-deaths-by-race")
+async def get_birth_death_data(
+    start_year: int | None = Query(None, description="Filter start year (e.g. 2000)"),
+    end_year: int | None = Query(None, description="Filter end year (e.g. 2023)"),
+    race: str | None = Query(None, description="Race/Ethnicity filter ('All', 'White', 'Black', 'Hispanic')"),
+    fmt: WireFormat = Depends(wire_format),
 ):
-    """Unemployment Rate (UNRATE)"""
-    try: 
-        df:pd.DataFrame = wages_and_employment._fetch_unrate(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
+    """Births and Deaths by Race/Ethnicity (CDC)"""
+    try:
+        return await COMPUTE.render(demographics._fetch_birth_death_data, {"start_year": start_year, "end_year": end_year, "race": race}, fmt)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/unemployed")
-def get_unemployed(
+@app.get("/all-commodity-prices")
+async def get_all_commodity_prices(
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
-    """Unemployment Level (UNEMPLOY) as count of Unemployed"""
-    try: 
-        df:pd.DataFrame = wages_and_employment._fetch_unemployment_level(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
+    """Aggregated Dataset with Average Price:  All Commodities available in API"""
+    try:
+        return await COMPUTE.render(commodities._fetch_all_commodity_prices, {"start_date": start_date, "end_date": end_date, "freq": resample.freq, "agg": resample.agg}, fmt, real=real)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/job-openings")
-def get_job_openings(
+@app.get("/mortgage-all")
+async def get_all_mortgage_rates(
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
-    freq:str = Query('M', description="Frequency period")
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
-    """Job Openings: Total Nonfarm (JTSJOL)"""
-    try: 
-        df:pd.DataFrame = wages_and_employment._fetch_job_openings(start_date=start_date, end_date=end_date)   
-
-        return JSONResponse(content=sanitize_for_json(df))
+    """
+    Fetch both 30-year and 15-year mortgage rates and merge them into a single DataFrame.
+    """
+    try:
+        return await COMPUTE.render(rates._fetch_all_mortgage_rates, {"start_date": start_date, "end_date": end_date, "freq": resample.freq, "agg": resample.agg}, fmt, real=real)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/used-cars")
-def get_used_car_prices(
+async def get_used_car_prices(
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
     """CPI Used Cars and Trucks (CUSR0000SETA02). Prices calculated based on CPI index applied to reference year and price"""
-    try: 
-        df:pd.DataFrame = inflation_and_prices._fetch_used_car_prices(start_date=start_date, end_date=end_date) 
-
-        return JSONResponse(content=sanitize_for_json(df))
+    try:
+        return await COMPUTE.render(inflation_and_prices._fetch_used_car_prices, {"start_date": start_date, "end_date": end_date, "freq": resample.freq, "agg": resample.agg}, fmt, real=real)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/new-cars")
-def get_new_car_prices(
+async def get_new_car_prices(
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
     """CPI New Cars and Trucks (CUUR0000SETA01). Prices calculated based on CPI index applied to reference year and price"""
-    try: 
-        df:pd.DataFrame = inflation_and_prices._fetch_new_car_prices(start_date=start_date, end_date=end_date) 
-
-        return JSONResponse(content=sanitize_for_json(df))
+    try:
+        return await COMPUTE.render(inflation_and_prices._fetch_new_car_prices, {"start_date": start_date, "end_date": end_date, "freq": resample.freq, "agg": resample.agg}, fmt, real=real)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/all-car-prices")
-def get_all_car_prices(
+async def get_all_car_prices(
     start_date: str | None = Query(None, description="Filter start date (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="Filter end date (YYYY-MM-DD)"),
+    resample: Resampling = Depends(resampling),
+    real: RealDollars | None = Depends(real_dollars),
+    fmt: WireFormat = Depends(wire_format),
 ):
     """Merged dataset with New Car CPI (CUUR0000SETA01) and Used Car CPI (CUSR0000SETA02). Prices calculated based on CPI indices for New and Used autos applied to reference years and prices"""
-    try: 
-        df:pd.DataFrame = inflation_and_prices._fetch_all_car_prices(start_date=start_date, end_date=end_date)
-
-        return JSONResponse(content=sanitize_for_json(df))
+    try:
+        return await COMPUTE.render(inflation_and_prices._fetch_all_car_prices, {"start_date": start_date, "end_date": end_date, "freq": resample.freq, "agg": resample.agg}, fmt, real=real)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/home-affordability")
-def get_home_affordability(
+async def get_home_affordability(
     start_year: int | None = Query(None, description="Filter start year (YYYY)"),
     end_year: int | None = Query(None, description="Filter end year (YYYY)"),
+    fmt: WireFormat = Depends(wire_format),
 ):
     """
     Merged Report exploring prices and premiums of buying a home over the years.
     """
-    try: 
-        df:pd.DataFrame = income_and_spending._fetch_build_home_affordability(start_year=start_year, end_year=end_year)   
+    try:
+        # on-demand (or ?as_of=) view builds read every input series, keep them off the event loop
+        df: pd.DataFrame = await run_in_threadpool(income_and_spending._fetch_build_home_affordability, start_year=start_year, end_year=end_year)
 
-        return JSONResponse(content=sanitize_for_json(df))
+        return render(df, fmt)
+    except NoVintage as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ViewUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class MortgageRequest(BaseModel):
+    """Batch of fixed-rate loans, priced at the given rates or at historical FRED averages."""
+    principal: list[Annotated[float, Field(ge=0, allow_inf_nan=False)]] = Field(..., min_length=1, description="Loan amounts")
+    rate: list[Annotated[float, Field(ge=0, allow_inf_nan=False)]] | None = Field(None, description="Annual rates in percent (omit to price at rate_date)")
+    rate_date: list[str] | None = Field(None, description="Dates (YYYY-MM-DD) to price at the MORTGAGE30US/MORTGAGE15US average")
+    years: list[Annotated[int, Field(gt=0)]] = Field([30], min_length=1, description="Loan terms in years")
+    grid: bool = Field(False, description="Price every combination of the inputs instead of pairing them element-wise")
+    balance_years: list[Annotated[int, Field(ge=0)]] = Field([], description="Add remaining balance and interest paid after these years")
+
+
+def loan_kwargs(req: MortgageRequest) -> dict:
+    if (req.rate is None) == (req.rate_date is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of rate or rate_date")
+    return {"principal": req.principal, "rate": req.rate, "rate_date": req.rate_date, "years": req.years, "grid": req.grid}
+
+
+@app.post("/mortgage/calculate")
+async def calculate_mortgages(req: MortgageRequest, fmt: WireFormat = Depends(wire_format)):
+    """
+    Monthly payment and lifetime totals for a batch (or grid) of loans in one vectorized pass.
+    """
+    loans = loan_kwargs(req)
+    try:
+        return await COMPUTE.render(mortgage.batch_frame, {"balance_years": req.balance_years, **loans}, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/mortgage/schedule")
+async def mortgage_schedules(req: MortgageRequest, fmt: WireFormat = Depends(wire_format)):
+    """
+    Month-by-month amortization schedules (Loan is the row index in the batch).
+    """
+    loans = loan_kwargs(req)
+    try:
+        return await COMPUTE.render(mortgage.schedule_frame, loans, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
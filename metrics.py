@@ -0,0 +1,277 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import bisect
+import functools
+import threading
+import time
+
+
+# stages a request's time is split into; anything not inside a stage only shows up in total
+STAGES = ("cache", "load", "filter", "merge", "transform", "serialize")
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MAX_ROUTE_LABELS = 1_000
+
+
+@dataclass
+class StageTimer:
+    """
+    Seconds spent per stage during one request. Stages nest: while an inner stage runs,
+    the enclosing one is paused, so each second is counted once.
+    """
+    seconds: dict = field(default_factory=dict)
+    _stack: list = field(default_factory=list)
+    _mark: float = 0.0
+
+    def _add(self, name: str, seconds: float):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def enter(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            self._add(self._stack[-1], now - self._mark)
+        self._stack.append(name)
+        self._mark = now
+
+    def exit(self):
+        now = time.perf_counter()
+        self._add(self._stack.pop(), now - self._mark)
+        self._mark = now
+
+    def merge(self, seconds: dict):
+        """
+        Add stage times measured elsewhere (a worker process).
+        """
+        for name, value in seconds.items():
+            self._add(name, value)
+
+    def header(self, total: float) -> str:
+        """
+        Server-Timing value: one entry per stage in milliseconds, then the total.
+        """
+        parts = [f"{name};dur={self.seconds[name] * 1000:.2f}" for name in STAGES if name in self.seconds]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_timer: ContextVar[StageTimer | None] = ContextVar("stage_timer", default=None)
+
+
+def start_timing():
+    """
+    Begin timing stages for the current context. Returns (timer, token for stop_timing).
+    """
+    timer = StageTimer()
+    return timer, _timer.set(timer)
+
+
+def stop_timing(token):
+    _timer.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Attribute the time spent in the block to a stage of the current request (no-op outside one).
+    """
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.exit()
+
+
+def staged(name: str):
+    """
+    Decorator form of stage() for functions that are a stage as a whole.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_stages(seconds: dict):
+    timer = _timer.get()
+    if timer is not None:
+        timer.merge(seconds)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@dataclass
+class Histogram:
+    """
+    Prometheus histogram with fixed labels; one cumulative bucket set per label combination.
+    """
+    name: str
+    help: str
+    labels: tuple
+    buckets: tuple = BUCKETS
+    _series: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._series.get(key)
+            if counts is None:
+                # one slot per bucket, +Inf, then sum
+                counts = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def lines(self) -> list[str]:
+        with self._lock:
+            series = {key: list(counts) for key, counts in sorted(self._series.items())}
+
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts in series.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                out.append(f"{self.name}_bucket{_label_text({**labels, 'le': _number(bound)})} {cumulative}")
+            out.append(f"{self.name}_sum{_label_text(labels)} {_number(counts[-1])}")
+            out.append(f"{self.name}_count{_label_text(labels)} {cumulative}")
+        return out
+
+
+def gauge_lines(name: str, help: str, samples: list[tuple[dict, float]], kind: str = "gauge") -> list[str]:
+    """
+    Exposition lines for a gauge (or counter) given as (labels, value) samples.
+    """
+    out = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    out.extend(f"{name}{_label_text(labels)} {_number(value)}" for labels, value in samples)
+    return out
+
+
+REQUEST_SECONDS = Histogram("disco_request_duration_seconds", "Request latency by route.", ("route", "method", "status"))
+STAGE_SECONDS = Histogram("disco_request_stage_seconds", "Time per request spent in each stage.", ("route", "stage"))
+
+
+class TimingMiddleware:
+    """
+    Times every HTTP request by stage, adds a Server-Timing header and feeds the
+    /metrics histograms. Put it outermost so cache hits and 304s are timed too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.endpoints = {}
+        self.paths = OrderedDict()
+
+    def route_label(self, scope) -> str:
+        """
+        Route template (e.g. /series/{series_id}) rather than the raw path, to keep label
+        cardinality bounded. Responses served before routing (cache hits) reuse the
+        template learned for their path.
+        """
+        path = scope["path"]
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return self.paths.get(path, "unmatched")
+
+        label = self.endpoints.get(endpoint)
+        if label is None:
+            app = scope.get("app")
+            routes = getattr(app, "routes", [])
+            label = next((r.path for r in routes if getattr(r, "endpoint", None) is endpoint), "unmatched")
+            self.endpoints[endpoint] = label
+
+        self.paths[path] = label
+        self.paths.move_to_end(path)
+        while len(self.paths) > MAX_ROUTE_LABELS:
+            self.paths.popitem(last=False)
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timer, token = start_timing()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # new header list: inner middleware may keep a reference to the original for replays
+                header = timer.header(time.perf_counter() - started).encode()
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_timing(token)
+            route = self.route_label(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=scope["method"], status=status)
+            for name, seconds in timer.seconds.items():
+                STAGE_SECONDS.observe(seconds, route=route, stage=name)
+
+
+def exposition(store: dict, responses: dict, resampled: dict, refresh: dict | None) -> str:
+    """
+    Prometheus text format for /metrics: the request histograms plus cache, refresh and
+    series gauges built from the stats() of the store, response cache and resampler.
+    """
+    lines = [*REQUEST_SECONDS.lines(), *STAGE_SECONDS.lines()]
+
+    caches = {"store": store, "responses": responses}
+    lines += gauge_lines("disco_cache_hits_total", "Cache hits.", [({"cache": n}, s["hits"]) for n, s in caches.items()], "counter")
+    lines += gauge_lines("disco_cache_misses_total", "Cache misses.", [({"cache": n}, s["misses"]) for n, s in caches.items()], "counter")
+    lines += gauge_lines("disco_cache_hit_ratio", "Hits over lookups since start.", [({"cache": n}, s["hit_ratio"]) for n, s in caches.items()])
+    lines += gauge_lines("disco_cache_bytes", "Bytes held by the cache.", [({"cache": n}, s["bytes"]) for n, s in caches.items()])
+    lines += gauge_lines("disco_response_cache_evictions_total", "Responses evicted to stay under the size limit.", [({}, responses["evictions"])], "counter")
+    lines += gauge_lines("disco_response_cache_invalidations_total", "Responses dropped because their series changed.", [({}, responses["invalidations"])], "counter")
+    lines += gauge_lines("disco_resample_cache_hits_total", "Resampled series served from cache.", [({}, resampled["hits"])], "counter")
+
+    lines += gauge_lines(
+        "disco_series_rows", "Rows of each series loaded in the store.",
+        [({"series": sid, "category": s["category"]}, s["rows"]) for sid, s in sorted(store["series"].items()) if s["rows"]],
+    )
+
+    if refresh is not None:
+        lines += gauge_lines("disco_refresh_duration_seconds", "Duration of the last refresh run.", [({}, refresh["seconds"])])
+        lines += gauge_lines("disco_refresh_finished_timestamp_seconds", "When the last refresh run finished.", [({}, refresh["finished"])])
+        lines += gauge_lines(
+            "disco_refresh_series_seconds", "Time spent refreshing each series in the last run.",
+            [({"series": r["series_id"], "status": r["status"]}, r["seconds"]) for r in refresh["series"]],
+        )
+        lines += gauge_lines(
+            "disco_refresh_series_fetched_rows", "Rows fetched from FRED for each series by the last run (the revision window for incremental pulls).",
+            [({"series": r["series_id"]}, r["rows"]) for r in refresh["series"]],
+        )
+        lines += gauge_lines(
+            "disco_refresh_vintage_errors", "Changed series whose vintage the last run failed to record.",
+            [({}, len(refresh.get("vintage_errors", {})))],
+        )
+
+    return "\n".join(lines) + "\n"
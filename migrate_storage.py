@@ -0,0 +1,13 @@
+from snapshots import current_root
+from storage import migrate_tree, primary_backend
+from store import DATA_DIR
+
+def main():
+    backend = primary_backend()
+    root = current_root(DATA_DIR)
+    migrated = migrate_tree(root, backend=backend)
+    print(f"Migrated {len(migrated)} series under {root} to {backend.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,33 @@
-from utils import calc_mtg_pi_payment, fetch_fred_series, merge_on_year, scale_for_inflation
+from utils import merge_on_year
+from store import STORE, SeriesStore
+from mortgage import monthly_payment
 import pandas as pd
-from fredapi import Fred
-import os
 import numpy as np
-from dotenv import load_dotenv
 
 
-load_dotenv()
+HOME_AFFORDABILITY_VIEW = "home_affordability"
 
 
-def _fetch_vehicle_ins_premiums(start_date:str=None, end_date:str=None):
-    """
-    Expenditures: Vehicle Insurance: All Consumer Units (CXU500110LB0101M) | path: /vehicle-insurance | default freq: M
-    """
-    df = fetch_fred_series(category="income_and_spending", series_id="CXU500110LB0101M", start_date=start_date, end_date=end_date)
-
-    return df
-
-
-def _fetch_pce_healthcare(start_date:str=None, end_date:str=None):
-    """
-    PCE Services: Healthcare (DHLCRC1Q027SBEA) | path: /pce-healthcare | default freq: M
-    """
-    df = fetch_fred_series(category="income_and_spending", series_id="DHLCRC1Q027SBEA", start_date=start_date, end_date=end_date)
-    df['PCE Healthcare'] = df['PCE Healthcare'] * 1000000000
-
-    return df
-
-
-def _fetch_houshold_ops_spend(start_date:str=None, end_date:str=None):
+def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     """
-    Expenditures: Household Operations: All Consumer Units (CXUHHOPERLB0101M) | path: /hh-ops | default freq: M
+    Home affordabiltiy matrix by year | path: /home-affordability | default freq: A
+    Served from the table materialized at refresh time (see _build_home_affordability).
     """
-    df = fetch_fred_series(category="income_and_spending", series_id="CXUHHOPERLB0101M", start_date=start_date, end_date=end_date)
+    table = STORE.table(HOME_AFFORDABILITY_VIEW)
 
-    return df
+    return table.between("Year", start_year, end_year).to_frame()
 
 
-def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
+def _build_home_affordability(store: SeriesStore):
     """
-    Home affordabiltiy matrix by year | path: /home-affordability | default freq: A
+    Build the full home affordability table from the stored series. Run by the refresh
+    as a materialized view, so requests never merge or call FRED.
     """
     hoi_ref_premium = 3303
     hoi_ref_year = 2024
 
-    fred = Fred(api_key=os.getenv("FRED_API_KEY"))
-
     #CPI table - resampled to annual on mean
-    cpi_df = fetch_fred_series(category="inflation_and_prices", series_id="CPIAUCSL")
+    cpi_df = store.get("inflation_and_prices", "CPIAUCSL").to_frame()
     cpi_df['Date'] = pd.to_datetime(cpi_df['Date'])
     cpi_df.set_index('Date', inplace=True)
     cpi_df = cpi_df.resample('YE').max()
@@ -56,8 +36,7 @@ def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     cpi_df.columns = ['Year', 'CPI']
 
     #HOI PPI table - resampled to annual on mean
-    hoi_series = fred.get_series('PCU9241269241262')
-    hoi_df = hoi_series.to_frame().reset_index()
+    hoi_df = store.get("income_and_spending", "PCU9241269241262").to_frame()
     hoi_df.columns = ['Date', 'HOI PPI']
     hoi_df['Date'] = pd.to_datetime(hoi_df['Date'])
     hoi_df.set_index('Date', inplace=True)
@@ -86,10 +65,13 @@ def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     )
     merged_hoi_df.loc[mask, "HOI PPI"] = np.nan
     # Add scaled premiums using CPI
-    merged_hoi_df['HOI Premium Nominal'] = merged_hoi_df.apply(lambda row: scale_for_inflation(cpi_df, 2024, row['Year'], row['HOI Premium Real']), axis=1)
+    cpi_by_year = cpi_df.set_index('Year')['CPI']
+    merged_hoi_df['HOI Premium Nominal'] = (
+        merged_hoi_df['HOI Premium Real'] * (merged_hoi_df['Year'].map(cpi_by_year) / cpi_by_year[2024])
+    ).round(2)
 
     #Median Home Prices DF - resampled to annual as mean
-    df_home_median_prices = fetch_fred_series(category="housing", series_id="MSPUS")
+    df_home_median_prices = store.get("housing", "MSPUS").to_frame()
     df_home_median_prices['Date'] = pd.to_datetime(df_home_median_prices['Date'])
     df_home_median_prices.set_index('Date', inplace=True)
     df_home_median_prices_annual = df_home_median_prices.resample('YE').mean()
@@ -98,7 +80,7 @@ def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     df_home_median_prices_annual.columns = ['Year', 'Median Sales Price']
 
     #Median Family Income - annual series
-    df_median_family_income = fetch_fred_series(category="wages_and_employment", series_id="MEFAINUSA646N")
+    df_median_family_income = store.get("wages_and_employment", "MEFAINUSA646N").to_frame()
     df_median_family_income['Date'] = pd.to_datetime(df_median_family_income['Date'])
     df_median_family_income.set_index('Date', inplace=True)
     df_median_family_income.index = df_median_family_income.index.year
@@ -106,7 +88,7 @@ def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     df_median_family_income.columns = ['Year', 'Median Family Income']
 
     #30Yr Mortgage Rates - resampled to annual as mean
-    df_mtg30 = fetch_fred_series(category="rates", series_id="MORTGAGE30US")
+    df_mtg30 = store.get("rates", "MORTGAGE30US").to_frame()
     df_mtg30['Date'] = pd.to_datetime(df_mtg30['Date'])
     df_mtg30.set_index('Date', inplace=True)
     df_mtg30 = df_mtg30.resample('YE').mean()
@@ -118,16 +100,10 @@ def _fetch_build_home_affordability(start_year:int=None, end_year:int=None):
     #Merge datasets and add customer features
     cdf = merge_on_year([merged_hoi_df, df_home_median_prices_annual, df_median_family_income, df_mtg30])
     cdf['Avg Loan Amount'] = cdf['Median Sales Price'] * .8
-    cdf['Mtg PI Monthly'] = cdf.apply(lambda row: calc_mtg_pi_payment(row['Avg Loan Amount'], row['30yr Mtg Rate']), axis=1).round(2)
+    cdf['Mtg PI Monthly'] = monthly_payment(cdf['Avg Loan Amount'].to_numpy(), cdf['30yr Mtg Rate'].to_numpy()).round(2)
     cdf['Mtg PI Annual'] = round(cdf['Mtg PI Monthly'] * 12, 2)
     cdf['Mtg PII Annual'] = round(cdf['Mtg PI Annual'] + cdf['HOI Premium Nominal'], 2)
     cdf['Mtg PII Monthly'] = round((cdf['Mtg PI Annual'] / 12) + (cdf['HOI Premium Nominal'] / 12), 2)
     cdf['Mtg Ratio'] = round(cdf['Mtg PII Annual'] / cdf['Median Family Income'], 3)
 
-    #Filter by year(s)
-    if start_year is not None:
-        cdf = cdf[cdf['Year'] >= start_year]
-    if end_year is not None:
-        cdf = cdf[cdf['Year'] <= end_year]
-
-    return cdf
\ No newline at end of file
+    return cdf.sort_values('Year').reset_index(drop=True)
\ No newline at end of file
@@ -1,11 +1,12 @@
 from utils import fetch_fred_series, merge_on_date, scale_for_inflation
+from deflator import get_deflator
 import pandas as pd
 
 
-def _fetch_cpi(start_date:str=None, end_date:str=None):
+def _fetch_cpi(start_date:str=None, end_date:str=None, freq:str=None, agg:str="mean"):
     """
     """
-    df = fetch_fred_series(category="inflation_and_prices", series_id="CPIAUCSL", start_date=start_date, end_date=end_date)
+    df = fetch_fred_series(category="inflation_and_prices", series_id="CPIAUCSL", start_date=start_date, end_date=end_date, freq=freq, agg=agg)
 
     return df
 
@@ -23,15 +24,7 @@ def _fetch_scaled_with_cpi(from_year:int=1980, to_year:int=2025, amount:float=10
     return val
 
 
-def _fetch_pce(start_date:str=None, end_date:str=None):
-    """
-    """
-    df = fetch_fred_series(category="inflation_and_prices", series_id="PCE", start_date=start_date, end_date=end_date)
-
-    return df
-
-
-def _fetch_used_car_prices(start_date:str=None, end_date:str=None):
+def _fetch_used_car_prices(start_date:str=None, end_date:str=None, freq:str=None, agg:str="mean"):
     """
     CPI Used Cars and Trucks (CUSR0000SETA02). Prices calculated based on CPI index applied to reference year and price
     """
@@ -39,29 +32,20 @@ def _fetch_used_car_prices(start_date:str=None, end_date:str=None):
     ref_price = 28472
 
     # Used Auto CPI df
-    used_auto_df = fetch_fred_series(category="inflation_and_prices", series_id="CUSR0000SETA02", start_date=start_date, end_date=end_date)
+    used_auto_df = fetch_fred_series(category="inflation_and_prices", series_id="CUSR0000SETA02", start_date=start_date, end_date=end_date, freq=freq, agg=agg)
 
-    # CPI
-    _cpi_df = _fetch_cpi(start_date=start_date, end_date=end_date)
-
-    used_merged = used_auto_df.merge(_cpi_df, 'inner', 'Date')
+    # keep months with a CPI observation, nominal prices are in dollars of each month relative to the last one
+    deflator = get_deflator()
+    used_merged = used_auto_df[deflator.positions(used_auto_df['Date'].to_numpy()) >= 0].reset_index(drop=True)
+    cpi_ratio = deflator.factors(used_merged['Date'].to_numpy(), base=used_merged['Date'].iloc[-1], invert=True)
 
     used_merged['Used Auto Price Real'] = round(used_merged['Used Auto CPI'] * (ref_price / ref_auto_cpi),2)
-    ref_cpi = used_merged['CPI'].iloc[-1]
-    used_merged['Used Auto Price Nominal'] = round(used_merged['Used Auto Price Real'] * (used_merged['CPI'] / ref_cpi), 2)
-
-    if start_date is not None:
-        used_merged = used_merged[used_merged['Date'] >= start_date]
-    if end_date is not None:
-        used_merged = used_merged[used_merged['Date'] <= end_date]
-
-    drop_cols = ['CPI']
-    used_merged.drop(columns=drop_cols, inplace=True)
+    used_merged['Used Auto Price Nominal'] = round(used_merged['Used Auto Price Real'] * cpi_ratio, 2)
 
     return used_merged
 
 
-def _fetch_new_car_prices(start_date:str=None, end_date:str=None):
+def _fetch_new_car_prices(start_date:str=None, end_date:str=None, freq:str=None, agg:str="mean"):
     """
     CPI New Cars and Trucks (CUUR0000SETA01). Prices calculated based on CPI index applied to reference year and price
     """
@@ -69,32 +53,25 @@ def _fetch_new_car_prices(start_date:str=None, end_date:str=None):
     ref_price = 48397
 
     # New Auto CPI
-    new_auto_df = fetch_fred_series(category="inflation_and_prices", series_id="CUUR0000SETA01", start_date=start_date, end_date=end_date)
+    new_auto_df = fetch_fred_series(category="inflation_and_prices", series_id="CUUR0000SETA01", start_date=start_date, end_date=end_date, freq=freq, agg=agg)
 
-    # CPI
-    _cpi_df = _fetch_cpi(start_date=start_date, end_date=end_date)
+    # keep months with a CPI observation, nominal prices are in dollars of each month relative to the last one
+    deflator = get_deflator()
+    new_merged = new_auto_df[deflator.positions(new_auto_df['Date'].to_numpy()) >= 0].reset_index(drop=True)
+    cpi_ratio = deflator.factors(new_merged['Date'].to_numpy(), base=new_merged['Date'].iloc[-1], invert=True)
 
-    new_merged = new_auto_df.merge(_cpi_df, 'inner', 'Date')
     new_merged['New Auto Price Real'] = round(new_merged['New Auto CPI'] * (ref_price / ref_auto_cpi),2)
-    ref_cpi = new_merged['CPI'].iloc[-1]
-    new_merged['New Auto Price Nominal'] = round(new_merged['New Auto Price Real'] * (new_merged['CPI'] / ref_cpi), 2)
+    new_merged['New Auto Price Nominal'] = round(new_merged['New Auto Price Real'] * cpi_ratio, 2)
 
-    if start_date is not None:
-        new_merged = new_merged[new_merged['Date'] >= start_date]
-    if end_date is not None:
-        new_merged = new_merged[new_merged['Date'] <= end_date]
-
-    drop_cols = ['CPI']
-    
-    return new_merged.drop(columns=drop_cols)
+    return new_merged
 
 
-def _fetch_all_car_prices(start_date:str=None, end_date:str=None):
+def _fetch_all_car_prices(start_date:str=None, end_date:str=None, freq:str=None, agg:str="mean"):
     """
     Merged dataset with New Car CPI (CUUR0000SETA01) and Used Car CPI (CUSR0000SETA02). Prices calculated based on CPI indices for New and Used autos applied to reference years and prices
     """
-    used_df = _fetch_used_car_prices(start_date=start_date, end_date=end_date)
-    new_df = _fetch_new_car_prices(start_date=start_date, end_date=end_date)
+    used_df = _fetch_used_car_prices(start_date=start_date, end_date=end_date, freq=freq, agg=agg)
+    new_df = _fetch_new_car_prices(start_date=start_date, end_date=end_date, freq=freq, agg=agg)
 
     df = merge_on_date([new_df, used_df])
     
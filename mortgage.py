@@ -0,0 +1,237 @@
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from store import STORE
+
+
+# FRED average rate series used to price loans at a historical date, by term in years
+RATE_SERIES = {
+    30: ("rates", "MORTGAGE30US"),
+    15: ("rates", "MORTGAGE15US"),
+}
+
+MAX_LOANS = 100_000
+MAX_SCHEDULE_ROWS = 2_000_000
+
+
+def monthly_payment(principal, annual_rate, years=30) -> np.ndarray:
+    """
+    Monthly principal & interest payment for arrays of loans (vectorized calc_mtg_pi_payment).
+    annual_rate is in percent; inputs broadcast against each other.
+    """
+    principal = np.asarray(principal, dtype="float64")
+    monthly_rate = np.asarray(annual_rate, dtype="float64") / 100 / 12
+    n_payments = np.asarray(years) * 12
+
+    growth = (1 + monthly_rate) ** n_payments
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * monthly_rate * growth / (growth - 1)
+
+    return np.where(monthly_rate == 0, principal / n_payments, payment)
+
+
+def _cents(values) -> np.ndarray:
+    # + 0.0 turns the -0.0 that rounding leaves on tiny negative residues into 0.0
+    return np.round(values, 2) + 0.0
+
+
+def _combine(*inputs, grid: bool = False) -> list[np.ndarray]:
+    """
+    Flat, aligned arrays from scalars or lists: every combination with grid=True,
+    element-wise broadcasting otherwise.
+    """
+    arrays = [np.atleast_1d(np.asarray(a)) for a in inputs]
+    size = int(np.prod([len(a) for a in arrays])) if grid else max(len(a) for a in arrays)
+    if size > MAX_LOANS:
+        raise ValueError(f"Batch of {size} loans exceeds the limit of {MAX_LOANS}")
+
+    if grid:
+        arrays = np.meshgrid(*arrays, indexing="ij")
+    else:
+        arrays = np.broadcast_arrays(*arrays)
+    return [a.ravel() for a in arrays]
+
+
+@dataclass
+class LoanBatch:
+    """
+    Fixed-rate loans as aligned arrays. Payments, totals and remaining balances are
+    closed-form array expressions, so thousands of loans cost one pass each.
+    """
+    principal: np.ndarray
+    annual_rate: np.ndarray
+    years: np.ndarray
+    rate_dates: np.ndarray = None
+    payment: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        self.principal = np.asarray(self.principal, dtype="float64")
+        self.annual_rate = np.asarray(self.annual_rate, dtype="float64")
+        self.years = np.asarray(self.years, dtype="int64")
+        if (self.years <= 0).any():
+            raise ValueError("Loan terms must be at least 1 year")
+        if (self.principal < 0).any() or not np.isfinite(self.principal).all():
+            raise ValueError("Principal must be a non-negative amount")
+        # NaN rates (dates before the rate series starts) are priced as NaN, not rejected
+        if (self.annual_rate < 0).any() or np.isinf(self.annual_rate).any():
+            raise ValueError("Rates must be finite and non-negative")
+        self.payment = monthly_payment(self.principal, self.annual_rate, self.years)
+
+    @classmethod
+    def of(cls, principal, annual_rate, years=30, grid: bool = False) -> "LoanBatch":
+        """
+        Build a batch from scalars or lists. grid=True takes every combination
+        (principal x rate x term), otherwise the inputs broadcast element-wise.
+        """
+        return cls(*_combine(principal, annual_rate, years, grid=grid))
+
+    @classmethod
+    def priced_at(cls, principal, dates, years=30, grid: bool = False) -> "LoanBatch":
+        """
+        Like of(), but each loan takes the historical FRED average rate for its term on its date.
+        """
+        dates = np.asarray(pd.to_datetime(np.atleast_1d(dates)), dtype="datetime64[ns]")
+        principal, dates, years = _combine(principal, dates, years, grid=grid)
+
+        return cls(principal, historical_rates(dates, years), years, rate_dates=dates)
+
+    def __len__(self) -> int:
+        return len(self.principal)
+
+    @property
+    def monthly_rate(self) -> np.ndarray:
+        return self.annual_rate / 100 / 12
+
+    @property
+    def n_payments(self) -> np.ndarray:
+        return self.years * 12
+
+    @property
+    def total_paid(self) -> np.ndarray:
+        return self.payment * self.n_payments
+
+    @property
+    def total_interest(self) -> np.ndarray:
+        return self.total_paid - self.principal
+
+    def balances(self, months) -> np.ndarray:
+        """
+        Remaining balance after each of the given payment counts, shape (loans, len(months)).
+        Zero once a loan is paid off.
+        """
+        k = np.asarray(months, dtype="float64")[None, :]
+        r = self.monthly_rate[:, None]
+        principal = self.principal[:, None]
+        payment = self.payment[:, None]
+
+        growth = (1 + r) ** k
+        with np.errstate(divide="ignore", invalid="ignore"):
+            balance = principal * growth - payment * (growth - 1) / r
+        balance = np.where(r == 0, principal - payment * k, balance)
+
+        return np.where(k >= self.n_payments[:, None], 0.0, np.maximum(balance, 0.0))
+
+    def interest_paid(self, months) -> np.ndarray:
+        """
+        Cumulative interest after each of the given payment counts, shape (loans, len(months)).
+        """
+        k = np.minimum(np.asarray(months)[None, :], self.n_payments[:, None])
+        paid_down = self.principal[:, None] - self.balances(np.asarray(months))
+        return self.payment[:, None] * k - paid_down
+
+    def schedule(self) -> pd.DataFrame:
+        """
+        Month-by-month amortization for every loan in long format
+        (Loan, Month, Payment, Interest, Principal, Balance).
+        """
+        rows = int(self.n_payments.sum())
+        if rows > MAX_SCHEDULE_ROWS:
+            raise ValueError(f"Schedule of {rows} rows exceeds the limit of {MAX_SCHEDULE_ROWS}")
+
+        months = np.arange(int(self.n_payments.max(initial=0)) + 1)
+        balances = self.balances(months)
+        opening, closing = balances[:, :-1], balances[:, 1:]
+
+        interest = opening * self.monthly_rate[:, None]
+        principal = opening - closing
+        active = months[None, 1:] <= self.n_payments[:, None]
+
+        loan, month = np.nonzero(active)
+        return pd.DataFrame({
+            "Loan": loan,
+            "Month": month + 1,
+            "Payment": _cents(interest[active] + principal[active]),
+            "Interest": _cents(interest[active]),
+            "Principal": _cents(principal[active]),
+            "Balance": _cents(closing[active]),
+        })
+
+    def to_frame(self, balance_years=()) -> pd.DataFrame:
+        """
+        One row per loan with payment and lifetime totals, plus remaining balance and
+        cumulative interest after each of balance_years.
+        """
+        df = pd.DataFrame({
+            "Principal": self.principal,
+            "Rate": self.annual_rate,
+            "Years": self.years,
+            "Payment": _cents(self.payment),
+            "Total Interest": _cents(self.total_interest),
+            "Total Paid": _cents(self.total_paid),
+        })
+        if self.rate_dates is not None:
+            df.insert(0, "Rate Date", self.rate_dates)
+        if len(balance_years):
+            if min(balance_years) < 0:
+                raise ValueError("balance_years must be non-negative")
+            months = np.asarray(balance_years) * 12
+            balances = self.balances(months)
+            interest = self.interest_paid(months)
+            for i, year in enumerate(balance_years):
+                df[f"Balance Year {year}"] = _cents(balances[:, i])
+                df[f"Interest Paid Year {year}"] = _cents(interest[:, i])
+
+        return df
+
+
+def historical_rates(dates, years) -> np.ndarray:
+    """
+    Average FRED mortgage rate for each (date, term): the latest weekly observation
+    on or before the date. Terms without a rate series raise ValueError.
+    """
+    dates = np.asarray(pd.to_datetime(np.atleast_1d(dates)), dtype="datetime64[ns]")
+    dates, years = np.broadcast_arrays(dates, np.atleast_1d(np.asarray(years)))
+    rates = np.full(len(dates), np.nan)
+
+    for term in np.unique(years).tolist():
+        if term not in RATE_SERIES:
+            raise ValueError(f"No historical rate series for {term}-year loans. Valid terms: {list(RATE_SERIES)}")
+        series = STORE.get(*RATE_SERIES[term])
+        keep = ~np.isnan(series.values)
+        obs_dates, obs_rates = series.dates[keep], np.asarray(series.values[keep], dtype="float64")
+
+        mask = years == term
+        pos = np.searchsorted(obs_dates, dates[mask], side="right") - 1
+        rates[mask] = np.where(pos >= 0, obs_rates[np.maximum(pos, 0)], np.nan)
+
+    return rates
+
+
+def loan_batch(principal, rate=None, rate_date=None, years=30, grid: bool = False) -> LoanBatch:
+    """
+    Batch priced at explicit rates, or at the historical average on rate_date when rate is None.
+    """
+    if rate is not None:
+        return LoanBatch.of(principal, rate, years, grid=grid)
+    return LoanBatch.priced_at(principal, rate_date, years, grid=grid)
+
+
+def batch_frame(balance_years=(), **loans) -> pd.DataFrame:
+    """
+    Summary table for loan_batch(**loans); a plain function so it can run in a worker process.
+    """
+    return loan_batch(**loans).to_frame(balance_years=balance_years)
+
+
+def schedule_frame(**loans) -> pd.DataFrame:
+    return loan_batch(**loans).schedule()
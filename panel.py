@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from metrics import staged
+from store import STORE
+
+
+@dataclass
+class Panel:
+    """
+    Several series on one shared, sorted Date index.
+    values is a (dates x series) float64 matrix with NaN where a series has no observation.
+    """
+    dates: np.ndarray
+    values: np.ndarray
+    names: list[str]
+    last_dates: np.ndarray
+
+    def to_frame(self, extra: dict = None) -> pd.DataFrame:
+        """
+        Wide frame Date, <name>, [<name><suffix> for each extra matrix], ... built in one go.
+        extra maps a column suffix to a matrix shaped like values.
+        """
+        columns = {"Date": self.dates}
+        for j, name in enumerate(self.names):
+            columns[name] = self.values[:, j]
+            for suffix, matrix in (extra or {}).items():
+                columns[f"{name}{suffix}"] = matrix[:, j]
+
+        return pd.DataFrame(columns)
+
+
+@staged("merge")
+def build_panel(keys: list[tuple[str, str]], start_date=None, end_date=None) -> Panel:
+    """
+    Load (category, series_id) series from the store, range-sliced, onto the union of their dates.
+    Each series is scattered into its column once, so cost grows linearly with the number of series.
+    """
+    series = [STORE.get(category, series_id).slice(start_date, end_date) for category, series_id in keys]
+
+    if series:
+        dates = np.unique(np.concatenate([s.dates for s in series]).astype("datetime64[ns]"))
+    else:
+        dates = np.array([], dtype="datetime64[ns]")
+
+    values = np.full((len(dates), len(series)), np.nan)
+    last_dates = np.full(len(series), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for j, s in enumerate(series):
+        values[np.searchsorted(dates, s.dates), j] = s.values
+        if s.rows:
+            last_dates[j] = s.dates[-1]
+
+    return Panel(dates=dates, values=values, names=[s.name for s in series], last_dates=last_dates)
@@ -0,0 +1,105 @@
+from typing import Callable
+import gzip
+import os
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    import brotli
+
+    return brotli.compress(body, quality=11)
+
+
+def _zstd(body: bytes) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=19).compress(body)
+
+
+# Content-Encoding -> compressor, in server preference order. Levels are the slow, dense
+# ones since each body is compressed once per data version, off the request path.
+CODINGS: dict[str, Callable[[bytes], bytes]] = {
+    "br": _brotli,
+    "zstd": _zstd,
+    "gzip": _gzip,
+}
+
+_MODULES = {"br": "brotli", "zstd": "zstandard"}
+
+
+def _available(coding: str) -> bool:
+    """
+    br and zstd need the optional brotli / zstandard packages; gzip is always there.
+    """
+    module = _MODULES.get(coding)
+    if module is None:
+        return True
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def configured_codings() -> tuple[str, ...]:
+    """
+    Codings to precompress cached responses with: DISCO_PRECOMPRESS (comma separated,
+    default all), minus the ones whose package isn't installed. Empty disables it.
+    """
+    wanted = os.getenv("DISCO_PRECOMPRESS", ",".join(CODINGS))
+    names = [name.strip() for name in wanted.split(",") if name.strip()]
+    return tuple(name for name in CODINGS if name in names and _available(name))
+
+
+def min_bytes() -> int:
+    """
+    Bodies smaller than this (DISCO_COMPRESS_MIN_BYTES, default 1024) are not worth compressing.
+    """
+    return int(os.getenv("DISCO_COMPRESS_MIN_BYTES", "1024"))
+
+
+def compress_all(body: bytes, codings) -> dict[str, bytes]:
+    """
+    Compressed variants of body, keeping only those that actually come out smaller.
+    """
+    variants = {}
+    for coding in codings:
+        compressed = CODINGS[coding](body)
+        if len(compressed) < len(body):
+            variants[coding] = compressed
+    return variants
+
+
+def negotiate_encoding(accept_encoding: str | None, available) -> str | None:
+    """
+    Best coding among available for an Accept-Encoding header, or None for identity.
+    Higher q wins; ties go to the server's preference order (CODINGS).
+    """
+    if not accept_encoding or not available:
+        return None
+
+    q = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        q[coding.strip().lower()] = weight
+
+    best, best_q = None, 0.0
+    for coding in CODINGS:
+        if coding not in available:
+            continue
+        weight = q.get(coding, q.get("*", 0.0))
+        if weight > best_q:
+            best, best_q = coding, weight
+    return best
@@ -0,0 +1,279 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from clients import FredClient, FredHTTPError
+from snapshots import begin_generation, collect_garbage, current_root, discard, publish
+from storage import locate
+from store import DATA_DIR
+from utils import load_registry, save_series
+from views import build_views
+from vintages import VINTAGES_DIR, VintageStore, record_generation
+
+
+@dataclass
+class TokenBucket:
+    """
+    Thread-safe token bucket. rate is tokens per second, capacity the allowed burst.
+    """
+    rate: float
+    capacity: float
+    _tokens: float = field(init=False)
+    _updated: float = field(init=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class SeriesResult:
+    """
+    Outcome of refreshing one registry entry.
+    """
+    series_id: str
+    category: str
+    status: str
+    mode: str = "full"
+    rows: int = 0
+    changed: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+
+@dataclass
+class RefreshEngine:
+    """
+    Refreshes registry series concurrently with a bounded worker pool.
+
+    All workers share one FredClient and one token bucket so the pool as a whole
+    stays under FRED's request quota (120 requests/minute per key by default).
+    429 and 5xx responses and network errors are retried with exponential backoff.
+
+    Series that are already stored are pulled incrementally: only observations from
+    lookback_days before the newest stored Date (registry "revision_lookback_days"
+    overrides it per series) are requested, so recent revisions are still picked up.
+    """
+    client: FredClient = field(default_factory=FredClient)
+    workers: int = field(default_factory=lambda: int(os.getenv("FRED_REFRESH_WORKERS", "8")))
+    requests_per_minute: float = field(default_factory=lambda: float(os.getenv("FRED_REQUESTS_PER_MINUTE", "120")))
+    burst: float = 10
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    lookback_days: int = field(default_factory=lambda: int(os.getenv("FRED_REVISION_LOOKBACK_DAYS", "90")))
+    root: str = DATA_DIR
+
+    def __post_init__(self):
+        self.limiter = TokenBucket(rate=self.requests_per_minute / 60, capacity=self.burst)
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Seconds to wait before the next attempt (full jitter, honours Retry-After).
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def fetch(self, series_id: str, result: SeriesResult, observation_start: str = None):
+        """
+        Pull one series, retrying transient failures. Attempts are counted on result.
+        """
+        while True:
+            result.attempts += 1
+            attempt = result.attempts
+            self.limiter.acquire()
+            try:
+                return self.client.get_series(series_id, observation_start=observation_start)
+            except FredHTTPError as e:
+                if not e.retryable or attempt > self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt, e.retry_after))
+            except (http.client.HTTPException, OSError):
+                if attempt > self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt))
+
+    def stored_dates(self, entry: dict):
+        """
+        Dates of the stored copy of a series, or None when it has to be pulled in full
+        (nothing stored yet, or the stored column no longer matches the registry name).
+        """
+        try:
+            backend, path = locate(self.root, entry["category"], entry["id"])
+            name, dates, _ = backend.read(path)
+        except FileNotFoundError:
+            return None
+
+        if name != entry["name"] or len(dates) == 0:
+            return None
+        return np.asarray(dates, dtype="datetime64[ns]")
+
+    def window_start(self, entry: dict, stored: np.ndarray) -> pd.Timestamp:
+        lookback = entry.get("revision_lookback_days", self.lookback_days)
+        return pd.Timestamp(stored[-1]) - pd.Timedelta(days=lookback)
+
+    @staticmethod
+    def consistent(stored: np.ndarray, fetched: pd.Series, start: pd.Timestamp) -> bool:
+        """
+        The trailing window has to reproduce exactly the stored dates it overlaps.
+        Missing or extra dates there mean a gap or a frequency change, so the window can't be trusted.
+        """
+        stored_window = stored[stored >= start.to_datetime64()]
+        fetched_dates = fetched.index.to_numpy(dtype="datetime64[ns]")
+        fetched_window = fetched_dates[fetched_dates <= stored[-1]]
+
+        return np.array_equal(stored_window, fetched_window)
+
+    def refresh_entry(self, entry: dict) -> SeriesResult:
+        sid = entry["id"]
+        category = entry["category"]
+        started = time.perf_counter()
+        result = SeriesResult(series_id=sid, category=category, status="failed")
+
+        try:
+            stored = self.stored_dates(entry)
+            series = None
+            if stored is not None:
+                start = self.window_start(entry, stored)
+                series = self.fetch(sid, result, observation_start=start)
+                if self.consistent(stored, series, start):
+                    result.mode = "incremental"
+                else:
+                    series = None
+
+            if series is None:
+                series = self.fetch(sid, result)
+
+            df = series.to_frame().reset_index()
+            df.columns = ["Date", entry["name"]]
+            result.changed = save_series(sid, category, df, root=self.root, replace=result.mode == "full")
+            result.status = "ok"
+            result.rows = len(df)
+        except Exception as e:
+            result.error = str(e)
+
+        result.seconds = round(time.perf_counter() - started, 3)
+        return result
+
+    def refresh(self, registry: list[dict]) -> list[SeriesResult]:
+        """
+        Refresh every entry and return one result per entry, in registry order.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="refresh") as pool:
+            return list(pool.map(self.refresh_entry, registry))
+
+
+def format_report(results: list[SeriesResult], seconds: float) -> str:
+    """
+    Plain-text per-series summary of a refresh run.
+    """
+    lines = [f"{'series':<20} {'status':<7} {'mode':<12} {'changed':<8} {'rows':>6} {'tries':>5} {'secs':>7}  error"]
+    for r in results:
+        lines.append(
+            f"{r.series_id:<20} {r.status:<7} {r.mode:<12} {str(r.changed):<8} {r.rows:>6} {r.attempts:>5} {r.seconds:>7.2f}  {r.error or ''}"
+        )
+
+    ok = sum(r.status == "ok" for r in results)
+    lines.append(f"{ok}/{len(results)} series refreshed in {seconds:.2f}s")
+    return "\n".join(lines)
+
+
+REFRESH_REPORT = "refresh.json"
+
+
+def write_refresh_report(root: str, results: list[SeriesResult], seconds: float, published: bool, vintage_errors: dict = None):
+    """
+    Record the outcome of the last refresh run in <root>/refresh.json (read by /metrics).
+    vintage_errors maps series_id to why its vintage couldn't be recorded.
+    """
+    report = {
+        "finished": time.time(),
+        "seconds": round(seconds, 3),
+        "published": published,
+        "series": [asdict(r) for r in results],
+        "vintage_errors": vintage_errors or {},
+    }
+    tmp = f"{root}/.{REFRESH_REPORT}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f)
+    os.replace(tmp, f"{root}/{REFRESH_REPORT}")
+
+
+def read_refresh_report(root: str) -> dict | None:
+    try:
+        with open(f"{root}/{REFRESH_REPORT}", "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def refresh_from_registry(path=f"{DATA_DIR}/registry.json", engine: RefreshEngine = None) -> list[SeriesResult]:
+    """
+    Pull and refresh all series defined in the registry JSON, then print a per-series report.
+
+    Writes go to a fresh dataset generation that is published with one atomic pointer
+    swap once every series is done, so API readers never see a half-written refresh.
+    Materialized views are rebuilt into the generation before it is published, and the
+    changed series are recorded as vintages once it is.
+    """
+    registry = load_registry(path)
+    engine = engine or RefreshEngine()
+    data_root = engine.root
+    engine.root = begin_generation(data_root)
+
+    started = time.perf_counter()
+    try:
+        results = engine.refresh(registry)
+    except BaseException:
+        discard(engine.root)
+        raise
+    finally:
+        generation, engine.root = engine.root, data_root
+    seconds = time.perf_counter() - started
+    print(format_report(results, seconds))
+
+    published = any(r.changed for r in results)
+    vintage_errors = {}
+    if published:
+        build_views(generation)
+        previous = current_root(data_root)
+        publish(data_root, generation)
+        print(f"Published generation {os.path.basename(generation)}")
+        vintage_errors = record_generation(previous, generation, results, VintageStore(root=f"{data_root}/{VINTAGES_DIR}"))
+        if vintage_errors:
+            print(f"{len(vintage_errors)} vintage(s) not recorded: {', '.join(sorted(vintage_errors))}")
+        for removed in collect_garbage(data_root):
+            print(f"Removed generation {removed}")
+    else:
+        discard(generation)
+        print("No series changed, keeping current generation")
+
+    write_refresh_report(data_root, results, seconds, published, vintage_errors)
+    return results
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field, replace
+import threading
+import numpy as np
+import pandas as pd
+from metrics import staged
+from store import Series
+
+
+# coarsest last; 'Y' is accepted as an alias for annual
+FREQUENCIES = ("D", "W", "M", "Q", "A")
+AGGREGATIONS = ("mean", "last", "first", "max", "min", "sum")
+
+
+def check_agg(agg: str) -> str:
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{agg}'. Valid options: {list(AGGREGATIONS)}")
+    return agg
+
+
+def normalize_freq(freq: str) -> str:
+    freq = freq.upper()
+    freq = "A" if freq == "Y" else freq
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency '{freq}'. Valid options: {list(FREQUENCIES)}")
+    return freq
+
+
+def periods(dates: np.ndarray, freq: str) -> np.ndarray:
+    """
+    Integer period ordinal for each date. Weeks run Monday to Sunday.
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    if freq == "D":
+        return dates.astype("datetime64[D]").astype("i8")
+    if freq == "W":
+        # 1970-01-01 was a Thursday; shift so ordinals turn over on Mondays
+        return (dates.astype("datetime64[D]").astype("i8") + 3) // 7
+    if freq == "M":
+        return dates.astype("datetime64[M]").astype("i8")
+    if freq == "Q":
+        return dates.astype("datetime64[M]").astype("i8") // 3
+    return dates.astype("datetime64[Y]").astype("i8")
+
+
+def group_bounds(ordinals: np.ndarray) -> np.ndarray:
+    """
+    Row positions where a new period begins (ordinals must be non-decreasing).
+    """
+    if not len(ordinals):
+        return np.array([], dtype="i8")
+    return np.flatnonzero(np.r_[True, np.diff(ordinals) != 0])
+
+
+def period_starts(ordinals: np.ndarray, freq: str) -> np.ndarray:
+    """
+    First day of each period, as datetime64[ns]; resampled rows are labelled with it.
+    """
+    if freq == "D":
+        starts = ordinals.astype("datetime64[D]")
+    elif freq == "W":
+        starts = (ordinals * 7 - 3).astype("datetime64[D]")
+    elif freq == "M":
+        starts = ordinals.astype("datetime64[M]")
+    elif freq == "Q":
+        starts = (ordinals * 3).astype("datetime64[M]")
+    else:
+        starts = ordinals.astype("datetime64[Y]")
+    return starts.astype("datetime64[ns]")
+
+
+def aggregate(values: np.ndarray, bounds: np.ndarray, agg: str) -> np.ndarray:
+    """
+    Reduce consecutive row groups starting at bounds, ignoring NaN.
+    values is (rows,) or (rows, columns); a group with no valid value gives NaN.
+    """
+    values = np.asarray(values, dtype="float64")
+    if not len(bounds):
+        return np.empty((0,) + values.shape[1:])
+
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid, bounds, axis=0)
+
+    if agg in ("mean", "sum"):
+        totals = np.add.reduceat(np.where(valid, values, 0.0), bounds, axis=0)
+        if agg == "sum":
+            return np.where(counts > 0, totals, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, totals / counts, np.nan)
+    if agg == "max":
+        return np.fmax.reduceat(values, bounds, axis=0)
+    if agg == "min":
+        return np.fmin.reduceat(values, bounds, axis=0)
+
+    # first / last valid observation per group by position
+    rows = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    if agg == "last":
+        pos = np.maximum.reduceat(np.where(valid, rows, -1), bounds, axis=0)
+    else:
+        pos = np.minimum.reduceat(np.where(valid, rows, len(values)), bounds, axis=0)
+    picked = np.take_along_axis(values, np.clip(pos, 0, len(values) - 1), axis=0) if values.ndim > 1 \
+        else values[np.clip(pos, 0, len(values) - 1)]
+    return np.where(counts > 0, picked, np.nan)
+
+
+def resample(dates: np.ndarray, values: np.ndarray, freq: str, agg: str = "mean") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Aggregate sorted observations into calendar periods. Returns (period start dates, values).
+    Only periods with at least one observation are returned (no upsampling or filling).
+    """
+    check_agg(agg)
+    ordinals = periods(dates, freq)
+    bounds = group_bounds(ordinals)
+
+    return period_starts(ordinals[bounds], freq), aggregate(values, bounds, agg)
+
+
+@staged("transform")
+def resample_frame(df: pd.DataFrame, freq: str, agg: str = "mean") -> pd.DataFrame:
+    """
+    Resample every numeric column of a Date-indexed frame in one pass; other columns are dropped.
+    """
+    freq = normalize_freq(freq)
+    df = df.sort_values("Date") if not df["Date"].is_monotonic_increasing else df
+    columns = [c for c in df.columns if c != "Date" and pd.api.types.is_numeric_dtype(df[c])]
+    dates, values = resample(df["Date"].to_numpy(), df[columns].to_numpy(dtype="float64"), freq, agg)
+
+    out = pd.DataFrame(values, columns=columns)
+    out.insert(0, "Date", dates)
+    return out
+
+
+@dataclass
+class _Resampled:
+    source: Series
+    result: Series
+    last_start: int
+
+
+@dataclass
+class Resampler:
+    """
+    Resampled copies of store series, cached per (category, series_id, freq, agg).
+
+    When the source series changes but everything before its last cached period is
+    identical (the usual refresh: new observations appended, the newest ones revised),
+    only that trailing part is re-aggregated and spliced onto the cached result.
+    """
+    _cache: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    full: int = 0
+    incremental: int = 0
+    hits: int = 0
+
+    @staged("transform")
+    def get(self, series: Series, freq: str, agg: str = "mean") -> Series:
+        freq = normalize_freq(freq)
+        check_agg(agg)
+        key = (series.category, series.series_id, freq, agg)
+        with self._lock:
+            cached = self._cache.get(key)
+
+        if cached is not None and cached.source.version == series.version:
+            with self._lock:
+                self.hits += 1
+            return cached.result
+
+        entry = self._update(cached, series, freq, agg) if cached is not None else None
+        if entry is None:
+            entry = self._compute(series, freq, agg)
+            with self._lock:
+                self.full += 1
+        else:
+            with self._lock:
+                self.incremental += 1
+
+        with self._lock:
+            self._cache[key] = entry
+        return entry.result
+
+    @staticmethod
+    def _compute(series: Series, freq: str, agg: str, offset: int = 0) -> _Resampled:
+        ordinals = periods(series.dates[offset:], freq)
+        bounds = group_bounds(ordinals)
+        result = replace(
+            series,
+            dates=period_starts(ordinals[bounds], freq),
+            values=aggregate(series.values[offset:], bounds, agg),
+        )
+        last_start = offset + (int(bounds[-1]) if len(bounds) else 0)
+        return _Resampled(source=series, result=result, last_start=last_start)
+
+    def _update(self, cached: _Resampled, series: Series, freq: str, agg: str) -> _Resampled | None:
+        """
+        Recompute only from the start of the last cached period, if the rows before it are unchanged.
+        """
+        prefix = cached.last_start
+        old = cached.source
+        if series.rows < prefix or prefix == 0:
+            return None
+        if not (np.array_equal(series.dates[:prefix], old.dates[:prefix])
+                and np.array_equal(series.values[:prefix], old.values[:prefix], equal_nan=True)):
+            return None
+
+        tail = self._compute(series, freq, agg, offset=prefix)
+        kept = len(cached.result.dates) - 1
+        result = replace(
+            series,
+            dates=np.concatenate([cached.result.dates[:kept], tail.result.dates]),
+            values=np.concatenate([cached.result.values[:kept], tail.result.values]),
+        )
+        return _Resampled(source=series, result=result, last_start=tail.last_start)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "full": self.full, "incremental": self.incremental}
+
+
+RESAMPLER = Resampler()
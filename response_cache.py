@@ -0,0 +1,189 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+from precompress import compress_all, configured_codings, min_bytes
+
+
+def _default_max_bytes() -> int:
+    return int(float(os.getenv("DISCO_RESPONSE_CACHE_MB", "64")) * 1024 * 1024)
+
+
+@dataclass
+class CachedResponse:
+    """
+    A fully serialized response plus the versions of the inputs it was built from.
+    variants holds the body precompressed per Content-Encoding (filled in the background).
+    """
+    versions: dict
+    status: int
+    headers: list
+    body: bytes
+    variants: dict = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers) + sum(map(len, self.variants.values()))
+
+    def encoded(self, coding: str) -> tuple[list, bytes]:
+        """
+        Headers and body for one precompressed variant. The ETag gets a -<coding> suffix,
+        since the bytes differ from the identity body.
+        """
+        body = self.variants[coding]
+        headers = []
+        for name, value in self.headers:
+            if name == b"content-length":
+                value = str(len(body)).encode()
+            elif name == b"etag":
+                value = value[:-1] + b"-" + coding.encode() + b'"'
+            headers.append((name, value))
+        headers.append((b"content-encoding", coding.encode()))
+        return headers, body
+
+
+@dataclass
+class ResponseCache:
+    """
+    Memory-bounded LRU of serialized response bodies keyed by (path, query variant).
+
+    Eviction is by total bytes rather than entry count, so one large /all-commodity-prices
+    body pushes out several small ones. An entry is only served while every input series
+    it read is still at the recorded version; otherwise it is dropped on lookup.
+
+    Each new entry is compressed once (codings, see precompress.py) on a background
+    thread, so encoded variants are served without any per-request compression.
+    """
+    max_bytes: int = field(default_factory=_default_max_bytes)
+    max_entry_bytes: int = None
+    codings: tuple = field(default_factory=configured_codings)
+    min_compress_bytes: int = field(default_factory=min_bytes)
+    _compressor: ThreadPoolExecutor = None
+    _entries: OrderedDict = field(default_factory=OrderedDict)
+    _bytes: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    compressed: int = 0
+    compress_seconds: float = 0.0
+
+    def __post_init__(self):
+        if self.max_entry_bytes is None:
+            self.max_entry_bytes = self.max_bytes // 4
+
+    def get(self, key, versions: dict) -> CachedResponse | None:
+        """
+        Cached response for key if it was built from exactly these input versions.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.versions != versions:
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def variants(self, key, versions: dict) -> dict:
+        """
+        Precompressed bodies held for key if it was built from these versions, without
+        counting a hit or miss (used to pick the ETag of a 304).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions:
+                return {}
+            return entry.variants
+
+    def record_miss(self):
+        """
+        Count a miss for a cacheable response whose inputs weren't known before it ran.
+        """
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key, entry: CachedResponse) -> bool:
+        size = entry.size
+        if size > self.max_entry_bytes:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            self._evict()
+
+            if self.codings and len(entry.body) >= self.min_compress_bytes:
+                if self._compressor is None:
+                    self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompress")
+                self._compressor.submit(self._compress, key, entry)
+        return True
+
+    def _compress(self, key, entry: CachedResponse):
+        started = time.process_time()
+        variants = compress_all(entry.body, self.codings)
+        seconds = time.process_time() - started
+
+        with self._lock:
+            self.compressed += 1
+            self.compress_seconds += seconds
+            # the entry may have been replaced or dropped while it was being compressed
+            if self._entries.get(key) is not entry:
+                return
+            entry.variants = variants
+            self._bytes += sum(map(len, variants.values()))
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def wait(self):
+        """
+        Block until queued compressions are done (benchmarks, tests).
+        """
+        with self._lock:
+            compressor = self._compressor
+        if compressor is not None:
+            compressor.submit(lambda: None).result()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "codings": list(self.codings),
+                "compressed": self.compressed,
+                "compress_seconds": round(self.compress_seconds, 3),
+            }
+
+
+RESPONSE_CACHE = ResponseCache()
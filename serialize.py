@@ -0,0 +1,378 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+import csv
+import io
+import json
+import threading
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+from metrics import stage, staged
+
+
+_DAY_TABLE_START = np.datetime64("1900-01-01", "D")
+_DAY_TABLE_END = np.datetime64("2101-01-01", "D")
+_day_table = None
+_day_table_lock = threading.Lock()
+
+
+def _day_tables() -> tuple[np.ndarray, np.ndarray]:
+    """
+    'YYYY-MM-DD' for every day 1900-2100 as raw bytes (S10) and as quoted JSON tokens,
+    built once, so dates are encoded by array lookup.
+    """
+    global _day_table
+    if _day_table is None:
+        with _day_table_lock:
+            if _day_table is None:
+                days = np.arange(_DAY_TABLE_START, _DAY_TABLE_END)
+                raw = np.datetime_as_string(days).astype("S10")
+                tokens = np.char.add(np.char.add('"', raw.astype(str)), '"').astype(object)
+                _day_table = (raw, tokens)
+    return _day_table
+
+
+def _day_offsets(values: np.ndarray):
+    """
+    Offsets into the day tables plus the NaT mask, or None when a date falls outside them.
+    """
+    days = values.astype("datetime64[D]")
+    missing = np.isnat(days)
+    valid = days[~missing]
+    if len(valid) and (valid.min() < _DAY_TABLE_START or valid.max() >= _DAY_TABLE_END):
+        return None, missing
+
+    offsets = (days - _DAY_TABLE_START).astype("i8")
+    offsets[missing] = 0
+    return offsets, missing
+
+
+def _encode_dates(values: np.ndarray) -> list[str]:
+    offsets, missing = _day_offsets(values)
+    if offsets is None:
+        tokens = np.char.add(np.char.add('"', np.datetime_as_string(values, unit="D")), '"').astype(object)
+    else:
+        tokens = _day_tables()[1][offsets]
+
+    if missing.any():
+        tokens[missing] = "null"
+    return tokens.tolist()
+
+
+def encode_column(values: np.ndarray) -> list[str]:
+    """
+    JSON tokens for one column, converted in bulk from the numpy array.
+    NaN/NaT/inf become null; dates are 'YYYY-MM-DD' strings.
+    """
+    values = np.asarray(values)
+    kind = values.dtype.kind
+
+    if kind == "M":
+        return _encode_dates(values)
+    if kind == "f":
+        # float repr is the shortest round-trip form, same as json.dumps
+        tokens = list(map(float.__repr__, values.tolist()))
+        for i in np.flatnonzero(~np.isfinite(values)).tolist():
+            tokens[i] = "null"
+        return tokens
+    if kind in "iu":
+        return list(map(int.__repr__, values.tolist()))
+    if kind == "b":
+        return np.where(values, "true", "false").tolist()
+
+    return [_encode_object(v) for v in values.tolist()]
+
+
+def _encode_object(value) -> str:
+    if value is None or (isinstance(value, float) and not np.isfinite(value)):
+        return "null"
+    if isinstance(value, pd.Timestamp):
+        return "null" if pd.isna(value) else f'"{value.strftime("%Y-%m-%d")}"'
+    return json.dumps(value)
+
+
+def _column_arrays(df: pd.DataFrame) -> list[tuple[str, np.ndarray]]:
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.DatetimeTZDtype):
+            col = col.dt.tz_localize(None)
+        columns.append((str(name), col.to_numpy()))
+    return columns
+
+
+def _record_template(names: list[str]) -> str:
+    """
+    One str.format template per row shape, filled column-wise.
+    """
+    keys = [json.dumps(name).replace("{", "{{").replace("}", "}}") for name in names]
+    return "{{" + ",".join(f"{key}:{{}}" for key in keys) + "}}"
+
+
+def json_records(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame as a JSON list of records straight from its column arrays.
+    Same payload as sanitize_for_json + JSONResponse, without the intermediate dicts.
+    """
+    columns = _column_arrays(df)
+    if not columns or not len(df):
+        return b"[]"
+
+    template = _record_template([name for name, _ in columns])
+    tokens = [encode_column(values) for _, values in columns]
+
+    body = ",".join(map(template.format, *tokens))
+    return f"[{body}]".encode()
+
+
+def json_columns(df: pd.DataFrame) -> bytes:
+    """
+    Columnar JSON: {"Date": [...], "<name>": [...]}. Column names appear once, not per row.
+    """
+    parts = [
+        f"{json.dumps(name)}:[{','.join(encode_column(values))}]"
+        for name, values in _column_arrays(df)
+    ]
+    return ("{" + ",".join(parts) + "}").encode()
+
+
+def _csv_field(value) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="").writerow([value])
+    return buf.getvalue()
+
+
+def csv_text(df: pd.DataFrame) -> bytes:
+    """
+    CSV with a header row; dates as YYYY-MM-DD and missing values as empty fields.
+    """
+    columns = _column_arrays(df)
+    header = ",".join(_csv_field(name) for name, _ in columns)
+
+    tokens = []
+    for _, values in columns:
+        if values.dtype.kind in "Mfiub":
+            col = encode_column(values)
+            col = ["" if t == "null" else t.strip('"') for t in col] if values.dtype.kind in "Mf" else col
+        else:
+            col = ["" if v is None or v != v else _csv_field(v) for v in values.tolist()]
+        tokens.append(col)
+
+    rows = map(",".join, zip(*tokens)) if tokens else []
+    return "\n".join([header, *rows, ""]).encode()
+
+
+def arrow_stream(df: pd.DataFrame) -> bytes:
+    """
+    Arrow IPC stream (needs the optional pyarrow package). Dates are sent as date32.
+    """
+    import pyarrow as pa
+
+    arrays, names = [], []
+    for name, values in _column_arrays(df):
+        if values.dtype.kind == "M":
+            array = pa.array(values.astype("datetime64[D]"), type=pa.date32())
+        elif values.dtype.kind == "f":
+            array = pa.array(values, mask=np.isnan(values))
+        else:
+            array = pa.array(values, from_pandas=True)
+        arrays.append(array)
+        names.append(name)
+
+    table = pa.Table.from_arrays(arrays, names=names)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_str(text: str) -> bytes:
+    raw = text.encode()
+    n = len(raw)
+    if n < 32:
+        return bytes([0xA0 | n]) + raw
+    if n < 256:
+        return bytes([0xD9, n]) + raw
+    if n < 65536:
+        return b"\xda" + n.to_bytes(2, "big") + raw
+    return b"\xdb" + n.to_bytes(4, "big") + raw
+
+
+def _msgpack_object(value) -> bytes:
+    if value is None or (isinstance(value, float) and value != value):
+        return b"\xc0"
+    if isinstance(value, bool):
+        return b"\xc3" if value else b"\xc2"
+    if isinstance(value, int):
+        return b"\xd3" + value.to_bytes(8, "big", signed=True)
+    if isinstance(value, float):
+        return b"\xcb" + np.float64(value).astype(">f8").tobytes()
+    return _msgpack_str(str(value))
+
+
+def _msgpack_fixed(tag: int, payload: np.ndarray, missing: np.ndarray) -> bytes:
+    """
+    Pack n fixed-width elements (tag byte + payload row) in one go; missing ones shrink to nil.
+    """
+    n, width = payload.shape
+    buf = np.empty((n, width + 1), dtype=np.uint8)
+    buf[:, 0] = tag
+    buf[:, 1:] = payload
+    if not missing.any():
+        return buf.tobytes()
+
+    buf[missing, 0] = 0xC0
+    keep = np.ones(buf.shape, dtype=bool)
+    keep[missing, 1:] = False
+    return buf[keep].tobytes()
+
+
+def _msgpack_column(values: np.ndarray) -> bytes:
+    n = len(values)
+    header = b"\xdd" + n.to_bytes(4, "big")
+    kind = values.dtype.kind
+
+    if kind == "f":
+        payload = values.astype(">f8").view(np.uint8).reshape(n, 8)
+        return header + _msgpack_fixed(0xCB, payload, np.isnan(values))
+    if kind in "iu" and values.dtype.itemsize <= 8 and (kind == "i" or values.max(initial=0) < 2 ** 63):
+        payload = values.astype(">i8").view(np.uint8).reshape(n, 8)
+        return header + _msgpack_fixed(0xD3, payload, np.zeros(n, dtype=bool))
+    if kind == "M":
+        offsets, missing = _day_offsets(values)
+        if offsets is not None:
+            payload = _day_tables()[0][offsets].view(np.uint8).reshape(n, 10)
+            return header + _msgpack_fixed(0xAA, payload, missing)
+        text = np.datetime_as_string(values, unit="D").astype(object)
+        text[missing] = None
+        return header + b"".join(_msgpack_object(v) for v in text.tolist())
+
+    return header + b"".join(_msgpack_object(v) for v in values.tolist())
+
+
+def msgpack_columns(df: pd.DataFrame) -> bytes:
+    """
+    MessagePack map of column name -> array, packed column-wise from the numpy arrays.
+    """
+    columns = _column_arrays(df)
+    n = len(columns)
+    header = bytes([0x80 | n]) if n < 16 else b"\xde" + n.to_bytes(2, "big")
+
+    return header + b"".join(_msgpack_str(name) + _msgpack_column(values) for name, values in columns)
+
+
+# ?stream= modes: media type of the streamed body
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def stream_records(names: list[str], blocks: Iterable[list[np.ndarray]], mode: str = "ndjson") -> Iterator[bytes]:
+    """
+    Encode blocks of column arrays as they come: one JSON object per line (ndjson), or
+    a JSON array of records sent in pieces (json, byte-identical to json_records).
+    Only one block is held as text at a time.
+    """
+    template = _record_template(names)
+    if mode == "json":
+        yield b"["
+    first = True
+    for columns in blocks:
+        with stage("serialize"):
+            rows = map(template.format, *(encode_column(values) for values in columns))
+            if mode == "ndjson":
+                chunk = "\n".join(rows) + "\n"
+            else:
+                chunk = ("" if first else ",") + ",".join(rows)
+        first = False
+        yield chunk.encode()
+    if mode == "json":
+        yield b"]"
+
+
+@dataclass(frozen=True)
+class WireFormat:
+    name: str
+    media_type: str
+    encode: Callable[[pd.DataFrame], bytes]
+
+
+FORMATS = {
+    "json": WireFormat("json", "application/json", json_records),
+    "columns": WireFormat("columns", "application/json", json_columns),
+    "csv": WireFormat("csv", "text/csv; charset=utf-8", csv_text),
+    "arrow": WireFormat("arrow", "application/vnd.apache.arrow.stream", arrow_stream),
+    "msgpack": WireFormat("msgpack", "application/msgpack", msgpack_columns),
+}
+
+_ACCEPT = {
+    "application/json": "json",
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+
+
+def _available(name: str) -> bool:
+    if name != "arrow":
+        return True
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def negotiate(format: str | None, accept: str | None) -> WireFormat:
+    """
+    Pick the wire format from ?format= first, then the Accept header, defaulting to JSON records.
+    Raises ValueError for an unknown ?format= and LookupError when the requested
+    format can't be produced here (arrow without pyarrow).
+    """
+    if format:
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format '{format}'. Valid options: {list(FORMATS)}")
+        if not _available(format):
+            raise LookupError(f"Format '{format}' needs the optional pyarrow package")
+        return FORMATS[format]
+
+    if not accept:
+        return FORMATS["json"]
+
+    ranked = []
+    for i, item in enumerate(accept.split(",")):
+        media, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranked.append((-q, i, media.strip().lower()))
+
+    for neg_q, _, media in sorted(ranked):
+        if neg_q == 0:
+            break
+        if media in ("*/*", "application/*", ""):
+            return FORMATS["json"]
+        name = _ACCEPT.get(media)
+        if name and _available(name):
+            return FORMATS[name]
+
+    # nothing we recognise: serve the default rather than failing clients that send a generic Accept
+    return FORMATS["json"]
+
+
+@staged("serialize")
+def render(df: pd.DataFrame, fmt: WireFormat = None, status_code: int = 200) -> Response:
+    fmt = fmt or FORMATS["json"]
+    return Response(content=fmt.encode(df), status_code=status_code, media_type=fmt.media_type)
+
+
+def json_response(df: pd.DataFrame, status_code: int = 200) -> Response:
+    return render(df, FORMATS["json"], status_code)
@@ -0,0 +1,143 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from storage import VIEWS_DIR
+
+
+GENERATIONS_DIR = "generations"
+POINTER = "CURRENT"
+
+
+def keep_generations() -> int:
+    """
+    How many published generations garbage collection keeps (DISCO_KEEP_GENERATIONS, default 3).
+    """
+    return max(2, int(os.getenv("DISCO_KEEP_GENERATIONS", "3")))
+
+
+def read_pointer(root: str) -> str | None:
+    try:
+        with open(f"{root}/{POINTER}", "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_root(root: str) -> str:
+    """
+    Directory holding the published dataset generation. Trees that have never been
+    published through a refresh are served straight from root.
+    """
+    generation = read_pointer(root)
+    if generation is None:
+        return root
+    return f"{root}/{GENERATIONS_DIR}/{generation}"
+
+
+class PointerCache:
+    """
+    Resolves the current generation for readers, re-reading CURRENT only when its stat changes.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._key = None
+        self._resolved = root
+        self._lock = threading.Lock()
+
+    def resolve(self) -> str:
+        try:
+            st = os.stat(f"{self.root}/{POINTER}")
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            key = None
+
+        with self._lock:
+            if key != self._key:
+                self._resolved = current_root(self.root)
+                self._key = key
+            return self._resolved
+
+
+def _series_entries(source: str):
+    """
+    Relative paths of the stored series and materialized views under a generation (or legacy) root.
+    """
+    for category in sorted(os.listdir(source)):
+        category_path = f"{source}/{category}"
+        if category == GENERATIONS_DIR or not os.path.isdir(category_path):
+            continue
+        for name in sorted(os.listdir(category_path)):
+            if name.startswith("fred_") or (category == VIEWS_DIR and not name.startswith(".")):
+                yield f"{category}/{name}"
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def begin_generation(root: str) -> str:
+    """
+    Create a new generation directory seeded from the current one and return its path.
+
+    Files are hard-linked rather than copied. Writers always replace files (tmp + os.replace),
+    so a rewritten series gets a new inode and the published generation is never modified.
+    """
+    generation = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    target = f"{root}/{GENERATIONS_DIR}/{generation}"
+    source = current_root(root)
+    os.makedirs(target)
+
+    for rel in _series_entries(source):
+        src, dst = f"{source}/{rel}", f"{target}/{rel}"
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.isdir(src):
+            os.makedirs(dst, exist_ok=True)
+            for name in os.listdir(src):
+                _link_or_copy(f"{src}/{name}", f"{dst}/{name}")
+        else:
+            _link_or_copy(src, dst)
+
+    return target
+
+
+def publish(root: str, generation_path: str):
+    """
+    Make a generation current with a single atomic rename of the CURRENT pointer.
+    """
+    tmp = f"{root}/.{POINTER}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        f.write(os.path.basename(generation_path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, f"{root}/{POINTER}")
+
+
+def discard(generation_path: str):
+    shutil.rmtree(generation_path, ignore_errors=True)
+
+
+def collect_garbage(root: str, keep: int = None) -> list[str]:
+    """
+    Delete all but the newest `keep` generations, never the current one.
+    Readers still holding memory-mapped arrays of a deleted generation keep working.
+    """
+    keep = keep or keep_generations()
+    base = f"{root}/{GENERATIONS_DIR}"
+    if not os.path.isdir(base):
+        return []
+
+    current = read_pointer(root)
+    generations = sorted(os.listdir(base))
+    removed = []
+    for generation in generations[:-keep]:
+        if generation != current:
+            discard(f"{base}/{generation}")
+            removed.append(generation)
+
+    return removed
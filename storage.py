@@ -0,0 +1,189 @@
+import glob
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+
+
+class JsonBackend:
+    """
+    Row-oriented fred_<id>.json record files ([{"Date": "YYYY-MM-DD", "<name>": ...}, ...]).
+    Kept for the existing data/ tree and as an optional export.
+    """
+    name = "json"
+
+    def path(self, root: str, category: str, series_id: str) -> str:
+        return f"{root}/{category}/fred_{series_id}.json"
+
+    def marker(self, path: str) -> str:
+        """
+        File whose stat changes whenever the series is rewritten.
+        """
+        return path
+
+    def read(self, path: str) -> tuple[str, np.ndarray, np.ndarray]:
+        df = pd.read_json(path)
+        df["Date"] = pd.to_datetime(df["Date"])
+        name = [c for c in df.columns if c != "Date"][0]
+
+        return name, df["Date"].to_numpy(dtype="datetime64[ns]"), df[name].to_numpy()
+
+    def write(self, path: str, name: str, dates: np.ndarray, values: np.ndarray):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df = pd.DataFrame({"Date": pd.to_datetime(dates).strftime("%Y-%m-%d"), name: values})
+
+        tmp = f"{path}.tmp"
+        df.to_json(tmp, orient="records")
+        os.replace(tmp, path)
+
+
+class NpyBackend:
+    """
+    Columnar fred_<id>/ directory holding Date.npy, values.npy and meta.json.
+    Arrays are memory-mapped on read, so loading a series is close to zero-copy.
+    """
+    name = "npy"
+
+    def path(self, root: str, category: str, series_id: str) -> str:
+        return f"{root}/{category}/fred_{series_id}"
+
+    def marker(self, path: str) -> str:
+        # meta.json is written last, so its stat covers both arrays
+        return f"{path}/meta.json"
+
+    def read(self, path: str) -> tuple[str, np.ndarray, np.ndarray]:
+        with open(f"{path}/meta.json", "r") as f:
+            meta = json.load(f)
+        dates = np.load(f"{path}/Date.npy", mmap_mode="r")
+        values = np.load(f"{path}/values.npy", mmap_mode="r")
+
+        return meta["name"], dates, values
+
+    def write(self, path: str, name: str, dates: np.ndarray, values: np.ndarray):
+        os.makedirs(path, exist_ok=True)
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        values = np.asarray(values)
+
+        # replace each file atomically; readers holding an old mmap keep the old inode
+        for fname, arr in (("Date.npy", dates), ("values.npy", values)):
+            tmp = f"{path}/.{fname}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, f"{path}/{fname}")
+
+        tmp = f"{path}/.meta.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"name": name, "rows": len(dates), "dtype": values.dtype.str}, f)
+        os.replace(tmp, f"{path}/meta.json")
+
+
+VIEWS_DIR = "views"
+
+
+def table_path(root: str, name: str) -> str:
+    return f"{root}/{VIEWS_DIR}/{name}"
+
+
+def table_marker(path: str) -> str:
+    return f"{path}/meta.json"
+
+
+def write_table(path: str, df: pd.DataFrame):
+    """
+    Store a materialized table as one .npy per column plus meta.json (column order, rows).
+    The table is written to a scratch directory and swapped in, so a reader sees
+    either the old or the new table directory, never a mix of columns.
+    """
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = f"{parent}/.{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp"
+    os.makedirs(tmp)
+
+    columns = [str(c) for c in df.columns]
+    for i, col in enumerate(columns):
+        values = df[col].to_numpy()
+        if values.dtype.kind not in "biufM":
+            raise ValueError(f"Column '{col}' has unsupported dtype {values.dtype} for table storage")
+        np.save(f"{tmp}/{i}.npy", values)
+
+    with open(table_marker(tmp), "w") as f:
+        json.dump({"columns": columns, "rows": len(df)}, f)
+
+    old = None
+    if os.path.exists(path):
+        old = f"{tmp}.old"
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def read_table(path: str) -> dict[str, np.ndarray]:
+    """
+    Columns of a stored table (memory-mapped), in their stored order.
+    """
+    with open(table_marker(path), "r") as f:
+        meta = json.load(f)
+
+    return {col: np.load(f"{path}/{i}.npy", mmap_mode="r") for i, col in enumerate(meta["columns"])}
+
+
+BACKENDS = {
+    "json": JsonBackend(),
+    "npy": NpyBackend(),
+}
+
+
+def primary_backend():
+    """
+    Backend new data is written to and read from first (DISCO_STORAGE, default npy).
+    """
+    return BACKENDS[os.getenv("DISCO_STORAGE", "npy")]
+
+
+def json_export_enabled() -> bool:
+    """
+    Whether refreshes also write the fred_<id>.json export next to the primary format.
+    """
+    return os.getenv("DISCO_JSON_EXPORT", "0").lower() in ("1", "true", "yes")
+
+
+def locate(root: str, category: str, series_id: str):
+    """
+    Find the stored copy of a series, preferring the primary backend and
+    falling back to JSON for trees that have not been migrated yet.
+    Returns (backend, path).
+    """
+    primary = primary_backend()
+    candidates = [primary] if primary is BACKENDS["json"] else [primary, BACKENDS["json"]]
+
+    for backend in candidates:
+        path = backend.path(root, category, series_id)
+        if os.path.exists(backend.marker(path)):
+            return backend, path
+
+    raise FileNotFoundError(f"No stored data for {category}/{series_id} under {root}")
+
+
+def migrate_tree(root: str, backend=None, remove_json: bool = False) -> list[str]:
+    """
+    One-shot conversion of every data/<category>/fred_<id>.json into the given backend.
+    """
+    backend = backend or primary_backend()
+    source = BACKENDS["json"]
+    migrated = []
+
+    for path in sorted(glob.glob(f"{root}/*/fred_*.json")):
+        category = os.path.basename(os.path.dirname(path))
+        series_id = os.path.basename(path)[len("fred_"):-len(".json")]
+
+        name, dates, values = source.read(path)
+        backend.write(backend.path(root, category, series_id), name, dates, values)
+        migrated.append(series_id)
+
+        if remove_json:
+            os.remove(path)
+
+    return migrated
@@ -0,0 +1,441 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+import os
+import threading
+import numpy as np
+import pandas as pd
+from metrics import staged
+from snapshots import PointerCache
+from storage import locate, read_table, table_marker, table_path
+
+
+DATA_DIR = os.getenv("DISCO_DATA_DIR", "data")
+
+
+def to_ns(date) -> int:
+    """
+    Convert a date-like value ('YYYY-MM-DD', Timestamp, datetime64) to int64 ns since epoch.
+    """
+    return pd.Timestamp(date).as_unit("ns").value
+
+
+@dataclass
+class Series:
+    """
+    One parsed FRED series held in memory as a pair of typed arrays.
+    dates is datetime64[ns] and sorted ascending, values is aligned with dates.
+    """
+    category: str
+    series_id: str
+    name: str
+    dates: np.ndarray
+    values: np.ndarray
+    version: tuple
+
+    @property
+    def rows(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.values.nbytes
+
+    @property
+    def index(self) -> np.ndarray:
+        """
+        Sorted int64 view (ns since epoch) of dates, used for range lookups.
+        """
+        return self.dates.view("i8")
+
+    def bounds(self, start_date=None, end_date=None) -> tuple[int, int]:
+        """
+        Row positions [lo, hi) covering start_date <= Date <= end_date, found by binary search.
+        """
+        index = self.index
+        lo = 0 if start_date is None else int(np.searchsorted(index, to_ns(start_date), side="left"))
+        hi = len(index) if end_date is None else int(np.searchsorted(index, to_ns(end_date), side="right"))
+
+        return lo, max(lo, hi)
+
+    @staged("filter")
+    def slice(self, start_date=None, end_date=None) -> "Series":
+        """
+        Series restricted to a date range. dates/values are views, nothing is copied.
+        """
+        lo, hi = self.bounds(start_date, end_date)
+        if lo == 0 and hi == self.rows:
+            return self
+
+        return replace(self, dates=self.dates[lo:hi], values=self.values[lo:hi])
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Build a fresh DataFrame (Date, <name>). Callers are free to mutate it.
+        """
+        return pd.DataFrame({"Date": self.dates, self.name: self.values})
+
+
+@dataclass
+class Table:
+    """
+    A materialized view (multi-column table built at refresh time) held as column arrays.
+    """
+    name: str
+    columns: dict
+    version: tuple
+
+    @property
+    def rows(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    @staged("filter")
+    def between(self, column: str, low=None, high=None) -> "Table":
+        """
+        Rows with low <= column <= high, found by binary search on the (sorted) column.
+        """
+        key = self.columns[column]
+        lo = 0 if low is None else int(np.searchsorted(key, low, side="left"))
+        hi = len(key) if high is None else int(np.searchsorted(key, high, side="right"))
+        hi = max(lo, hi)
+
+        return replace(self, columns={name: values[lo:hi] for name, values in self.columns.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: np.array(values) for name, values in self.columns.items()})
+
+
+@dataclass
+class ReadTracker:
+    """
+    Records which stored inputs (and at which version) a request read.
+    deps maps ("series", category, series_id), ("table", name) or ("file", path) to its version tuple.
+    volatile is set when the request also used data from outside the store.
+    """
+    deps: dict = field(default_factory=dict)
+    volatile: bool = False
+
+
+_tracker: ContextVar[ReadTracker | None] = ContextVar("store_reads", default=None)
+
+
+def start_tracking():
+    """
+    Begin recording reads for the current context. Returns (tracker, token for stop_tracking).
+    """
+    tracker = ReadTracker()
+    return tracker, _tracker.set(tracker)
+
+
+def stop_tracking(token):
+    _tracker.reset(token)
+
+
+def record_reads(deps: dict, volatile: bool = False):
+    """
+    Merge reads made elsewhere (e.g. in a worker process) into the current tracker.
+    """
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.deps.update(deps)
+        tracker.volatile = tracker.volatile or volatile
+
+
+_as_of: ContextVar[str | None] = ContextVar("as_of", default=None)
+
+
+def set_as_of(as_of: str | None):
+    """
+    Serve reads in the current context from the vintage recorded on or before as_of
+    (YYYY-MM-DD) instead of the published data. Returns a token for reset_as_of.
+    """
+    return _as_of.set(as_of)
+
+
+def reset_as_of(token):
+    _as_of.reset(token)
+
+
+def current_as_of() -> str | None:
+    return _as_of.get()
+
+
+def file_version(path: str) -> tuple:
+    st = os.stat(path)
+    return ("file", st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def track_file(path: str):
+    """
+    Note a read of a file outside the series store (static datasets).
+    """
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.deps[("file", path)] = file_version(path)
+
+
+def mark_volatile():
+    """
+    Note that the current request used data the store can't version (e.g. a live API call).
+    """
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.volatile = True
+
+
+class ViewUnavailable(LookupError):
+    """
+    A materialized view isn't stored yet and can't be built from the stored series either.
+    """
+
+
+@dataclass
+class _Entry:
+    series: Series | Table = None
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class SeriesStore:
+    """
+    Process-wide cache of parsed series keyed by (category, series_id).
+    Each file is parsed once and reloaded only when its mtime/size changes.
+    Reads follow the published dataset generation (data/CURRENT) without a restart;
+    series a refresh did not touch are hard-linked across generations and stay cached.
+    """
+    root: str = DATA_DIR
+    _entries: dict = field(default_factory=dict)
+    _built: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._pointer = PointerCache(self.root)
+
+    @property
+    def current_root(self) -> str:
+        return self._pointer.resolve()
+
+    def version(self, category: str, series_id: str, root: str = None) -> tuple:
+        """
+        Cheap change marker for a stored series, no parsing involved.
+        """
+        backend, path = locate(root or self.current_root, category, series_id)
+        st = os.stat(backend.marker(path))
+        return (backend.name, st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @staged("load")
+    def get(self, category: str, series_id: str) -> Series:
+        as_of = _as_of.get()
+        if as_of is not None:
+            return self.vintage(category, series_id, as_of)
+
+        key = (category, series_id)
+        root = self.current_root
+        version = self.version(category, series_id, root)
+
+        tracker = _tracker.get()
+        if tracker is not None:
+            tracker.deps[("series", category, series_id)] = version
+
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            if entry.series is not None and entry.series.version == version:
+                entry.hits += 1
+                return entry.series
+            entry.misses += 1
+
+        series = self._load(category, series_id, version, root)
+
+        with self._lock:
+            entry.series = series
+
+        return series
+
+    def vintage(self, category: str, series_id: str, as_of: str) -> Series:
+        """
+        The series as of a past date, rebuilt from the vintage store (see vintages.py).
+        """
+        from vintages import VINTAGES
+
+        series = VINTAGES.get(category, series_id, as_of)
+        tracker = _tracker.get()
+        if tracker is not None:
+            tracker.deps[("vintage", category, series_id, as_of)] = series.version
+        return series
+
+    def table_version(self, name: str, root: str = None) -> tuple:
+        st = os.stat(table_marker(table_path(root or self.current_root, name)))
+        return ("table", st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @staged("load")
+    def table(self, name: str) -> Table:
+        """
+        A materialized view from data/views/, cached like series and reloaded when it is rebuilt.
+        Under an as_of date, or before the first refresh has written it, the view is built
+        from its input series instead.
+        """
+        if _as_of.get() is not None:
+            return self.built_table(name)
+
+        key = ("views", name)
+        root = self.current_root
+        try:
+            version = self.table_version(name, root)
+        except FileNotFoundError:
+            return self.built_table(name)
+
+        tracker = _tracker.get()
+        if tracker is not None:
+            tracker.deps[("table", name)] = version
+
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            if entry.series is not None and entry.series.version == version:
+                entry.hits += 1
+                return entry.series
+            entry.misses += 1
+
+        table = Table(name=name, columns=read_table(table_path(root, name)), version=version)
+
+        with self._lock:
+            entry.series = table
+
+        return table
+
+    def built_table(self, name: str) -> Table:
+        """
+        A view built on demand by its builder in views.py from the series in the store (or
+        their vintages under as_of). Kept until one of the series it read changes.
+        Raises ViewUnavailable when an input series isn't stored.
+        """
+        from views import VIEWS
+
+        key = (name, _as_of.get())
+        with self._lock:
+            built = self._built.get(key)
+        if built is not None:
+            deps, table = built
+            try:
+                current = {dep: self.dependency_version(dep) for dep in deps}
+            except (OSError, LookupError):
+                current = None
+            if current == deps:
+                record_reads(deps)
+                return table
+
+        tracker, token = start_tracking()
+        try:
+            df = VIEWS[name](self)
+        except FileNotFoundError:
+            raise ViewUnavailable(f"View '{name}' is not built yet and some of its input series are not stored; it is built by the next refresh")
+        finally:
+            stop_tracking(token)
+
+        table = Table(name=name, columns={col: df[col].to_numpy() for col in df.columns}, version=("built", name))
+        with self._lock:
+            self._built[key] = (dict(tracker.deps), table)
+        record_reads(tracker.deps)
+        return table
+
+    def _load(self, category: str, series_id: str, version: tuple, root: str) -> Series:
+        backend, path = locate(root, category, series_id)
+        name, dates, values = backend.read(path)
+
+        # range lookups rely on sorted dates; stored files normally already are
+        if len(dates) > 1 and (np.diff(dates.view("i8")) < 0).any():
+            order = np.argsort(dates, kind="stable")
+            dates, values = dates[order], values[order]
+
+        return Series(
+            category=category,
+            series_id=series_id,
+            name=name,
+            dates=dates,
+            values=values,
+            version=version,
+        )
+
+    def cached(self, category: str, series_id: str) -> Series | None:
+        """
+        The parsed series if it is already in memory and current, else None (also when the
+        series isn't stored at all). Never loads.
+        """
+        try:
+            version = self.version(category, series_id)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._entries.get((category, series_id))
+            if entry is None or entry.series is None or entry.series.version != version:
+                return None
+            return entry.series
+
+    def preload(self, keys, workers: int = 8) -> dict:
+        """
+        Load many (category, series_id) pairs concurrently, e.g. to warm a fresh process.
+        Returns key -> error message for the series that could not be loaded.
+        """
+        def load(key):
+            try:
+                self.get(*key)
+            except Exception as e:
+                return key, str(e)
+            return key, None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="preload") as pool:
+            return {key: error for key, error in pool.map(load, keys) if error is not None}
+
+    def dependency_version(self, dep: tuple) -> tuple:
+        """
+        Current version of a dependency recorded by a ReadTracker.
+        """
+        if dep[0] == "file":
+            return file_version(dep[1])
+        if dep[0] == "table":
+            return self.table_version(dep[1])
+        if dep[0] == "vintage":
+            from vintages import VINTAGES
+
+            return VINTAGES.version(dep[1], dep[2], dep[3])
+        return self.version(dep[1], dep[2])
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counts and memory use per cached series.
+        """
+        with self._lock:
+            items = list(self._entries.items())
+
+        series = {}
+        for (category, series_id), entry in items:
+            loaded = entry.series
+            series[series_id] = {
+                "category": category,
+                "hits": entry.hits,
+                "misses": entry.misses,
+                "rows": loaded.rows if loaded else 0,
+                "bytes": loaded.nbytes if loaded else 0,
+            }
+
+        hits = sum(s["hits"] for s in series.values())
+        misses = sum(s["misses"] for s in series.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "bytes": sum(s["bytes"] for s in series.values()),
+            "series": series,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._built.clear()
+
+
+STORE = SeriesStore()
@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from clients import retry_after_seconds
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("5") == 5.0
+    assert retry_after_seconds("-3") == 0.0
+    assert retry_after_seconds(None) is None
+
+
+def test_retry_after_http_date():
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 50 < retry_after_seconds(later) <= 60
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_retry_after_unparseable():
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds("nan") is None
@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+from snapshots import PointerCache
+from store import STORE
+import main
+
+
+def test_compute_over_unstored_series(tmp_path, monkeypatch):
+    # every registry series is registered but none is stored under an empty data root
+    monkeypatch.setattr(STORE, "_pointer", PointerCache(str(tmp_path)))
+    response = TestClient(main.app).get("/compute", params={"expr": "MORTGAGE30US*2"})
+    assert response.status_code == 500
+    assert "No stored data" in response.json()["detail"]
@@ -0,0 +1,16 @@
+from starlette.datastructures import Headers
+from conditional import ConditionalGetMiddleware
+
+ETAG = '"abc123"'
+
+
+def test_matching_tag_echoes_precompressed_variant():
+    headers = Headers({"if-none-match": 'W/"abc123-gzip"'})
+    assert ConditionalGetMiddleware.not_modified(headers, ETAG, None)
+    assert ConditionalGetMiddleware.matching_tag(headers, ETAG) == '"abc123-gzip"'
+
+
+def test_matching_tag_identity_and_wildcard():
+    assert ConditionalGetMiddleware.matching_tag(Headers({"if-none-match": '"other", "abc123"'}), ETAG) == ETAG
+    assert ConditionalGetMiddleware.matching_tag(Headers({"if-none-match": "*"}), ETAG) is None
+    assert ConditionalGetMiddleware.matching_tag(Headers({}), ETAG) is None
@@ -0,0 +1,33 @@
+import pytest
+from expressions import MAX_DEPTH, parse
+
+
+def test_parse_builds_postfix_plan():
+    plan = parse("(M2SL/GDP)*100")
+    assert plan.names == ("M2SL", "GDP")
+    assert plan.program == (("series", "M2SL"), ("series", "GDP"), ("binary", "/"), ("const", 100.0), ("binary", "*"))
+
+
+def test_parse_rejects_deep_unary_nesting():
+    # short enough for MAX_EXPR_LENGTH, deep enough to overflow ast.unparse
+    with pytest.raises(ValueError):
+        parse("-" * 450 + "SOFR")
+
+
+def test_parse_limits_operator_chain_depth():
+    parse("SOFR" + "+1" * MAX_DEPTH)
+    with pytest.raises(ValueError):
+        parse("SOFR" + "+1" * (MAX_DEPTH + 1))
+
+
+def test_parse_rejects_calls_and_attributes():
+    for expr in ["__import__('os')", "GDP.__class__", "1+2"]:
+        with pytest.raises(ValueError):
+            parse(expr)
+
+
+def test_frame_rejects_result_named_date():
+    from expressions import EXPRESSIONS
+
+    with pytest.raises(ValueError):
+        EXPRESSIONS.frame(parse("SOFR*2"), name="Date")
@@ -1,11 +1,14 @@
 import pandas as pd
 from functools import reduce
 import numpy as np
-import matplotlib as plt
 import os
 import json
-from fredapi import Fred
 from dotenv import load_dotenv
+from metrics import staged
+from store import DATA_DIR, STORE
+from resample import RESAMPLER
+from snapshots import current_root
+from storage import BACKENDS, json_export_enabled, locate, primary_backend
 
 load_dotenv()
 
@@ -15,6 +18,9 @@ def pull_fred_series(series_id: str, series_name: str):
     Fetch a time series from FRED by its series ID and convert it to a pandas DataFrame.
     Returns DataFrame with Date as datetime64.
     """
+    # fredapi is only needed by the legacy refresh path, keep it out of the API's imports
+    from fredapi import Fred
+
     try:
         fred = Fred(api_key=os.getenv("FRED_API_KEY"))
         series = fred.get_series(series_id)
@@ -27,57 +33,89 @@ def pull_fred_series(series_id: str, series_name: str):
         return None
 
 
-def series_to_json(series_id, category, df):
+def series_to_json(series_id, category, df, root=None):
     """
-    Merge new data with existing JSON (if any) and save back to disk.
+    Write a series as the row-oriented fred_<id>.json export.
     JSON always stores Date as 'YYYY-MM-DD' strings.
     """
-    folder = f"data/{category}"
-    os.makedirs(folder, exist_ok=True)
+    root = root or current_root(DATA_DIR)
+    backend = BACKENDS["json"]
+    path = backend.path(root, category, series_id)
+    name = [c for c in df.columns if c != "Date"][0]
+    backend.write(path, name, df["Date"].to_numpy(), df[name].to_numpy())
+
+    return path
+
 
-    path = f"{folder}/fred_{series_id}.json"
+def save_series(series_id, category, df, root=None, replace=False):
+    """
+    Merge new data with the stored series (if any) and save it with the primary storage backend.
+    New values win over stored ones for the same Date, so revisions are picked up.
+    With replace=True the stored series is overwritten instead (full pulls after a schema change).
+    Also writes the JSON export when DISCO_JSON_EXPORT is set.
+    Returns False when the merged series is identical to what is already stored.
+    root defaults to the published generation; refreshes pass their unpublished one.
+    """
+    root = root or current_root(DATA_DIR)
+    df_existing = None
+    try:
+        existing_backend, existing_path = locate(root, category, series_id)
+        name, dates, values = existing_backend.read(existing_path)
+        df_existing = pd.DataFrame({"Date": dates, name: values})
+    except FileNotFoundError:
+        pass
 
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            existing_data = json.load(f)
-        df_existing = pd.DataFrame(existing_data)
-        df_existing["Date"] = pd.to_datetime(df_existing["Date"])
+    if df_existing is not None and not replace:
         df_combined = pd.concat([df_existing, df])
     else:
         df_combined = df
 
     df_combined = (
-        df_combined.drop_duplicates(subset=["Date"])
+        df_combined.drop_duplicates(subset=["Date"], keep="last")
         .sort_values("Date")
         .reset_index(drop=True)
     )
 
-    # save date as string for JSON
-    df_combined["Date"] = df_combined["Date"].dt.strftime("%Y-%m-%d")
+    if df_existing is not None and _same_series(df_existing, df_combined):
+        print(f"No changes for {category}/{series_id}")
+        return False
 
-    df_combined.to_json(path, orient="records")
+    backend = primary_backend()
+    path = backend.path(root, category, series_id)
+    name = [c for c in df_combined.columns if c != "Date"][0]
+    backend.write(path, name, df_combined["Date"].to_numpy(), df_combined[name].to_numpy())
     print(f"Updated data saved to {path}")
 
+    if backend is not BACKENDS["json"] and json_export_enabled():
+        series_to_json(series_id, category, df_combined, root=root)
+
     return True
 
 
-def fetch_fred_series(category, series_id, start_date=None, end_date=None):
+def _same_series(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    name = left.columns[1]
+    return (
+        np.array_equal(left["Date"].to_numpy(), right["Date"].to_numpy())
+        and np.array_equal(left[name].to_numpy(dtype="float64"), right[name].to_numpy(dtype="float64"), equal_nan=True)
+    )
+
+
+def fetch_fred_series(category, series_id, start_date=None, end_date=None, freq=None, agg="mean"):
     """
-    Load series from local JSON and optionally filter by start_date/end_date.
+    Load series through the in-process store and optionally filter by start_date/end_date.
+    With freq ('D', 'W', 'M', 'Q', 'A') the series is first resampled with agg; rows are
+    labelled with the first day of their period.
     Returns DataFrame with Date as datetime64.
     """
-    path = f"data/{category}/fred_{series_id}.json"
-    df = pd.read_json(path)
+    # parsed once per file version; range is a binary search over the sorted dates
+    series = STORE.get(category, series_id)
+    if freq:
+        series = RESAMPLER.get(series, freq, agg)
+    series = series.slice(start_date or None, end_date or None)
 
-    # convert date to datetime on load
-    df["Date"] = pd.to_datetime(df["Date"])
-
-    if start_date:
-        df = df[df["Date"] >= pd.to_datetime(start_date)]
-    if end_date:
-        df = df[df["Date"] <= pd.to_datetime(end_date)]
-
-    return df
+    return series.to_frame()
 
 
 def load_registry(path: str):
@@ -88,20 +126,6 @@ def load_registry(path: str):
         return json.load(f)
 
 
-def refresh_from_registry(path="data/registry.json"):
-    """
-    Pull and refresh all series defined in the registry JSON.
-    """
-    registry = load_registry(path)
-    for entry in registry:
-        sid = entry["id"]
-        name = entry["name"]
-        category = entry["category"]
-        df = pull_fred_series(sid, name)
-        if df is not None:
-            series_to_json(sid, category, df)
-
-
 def scale_for_inflation(cpi_df: pd.DataFrame, from_year: int, to_year: int, amount: float):
     from_year_cpi = cpi_df.loc[cpi_df['Year'] == from_year, 'CPI'].values[0]
     to_year_cpi = cpi_df.loc[cpi_df['Year'] == to_year, 'CPI'].values[0]
@@ -110,6 +134,7 @@ def scale_for_inflation(cpi_df: pd.DataFrame, from_year: int, to_year: int, amou
     return round(adjusted_value, 2)
 
 
+@staged("merge")
 def merge_on_date(dfs, how='inner'):
     cleaned = []
     for i, df in enumerate(dfs):
@@ -126,6 +151,7 @@ def merge_on_date(dfs, how='inner'):
     return merged_df
 
 
+@staged("merge")
 def merge_on_year(dfs, how='inner'):
     """
     Merge a list of dataframes on the 'Year' column.
@@ -163,14 +189,3 @@ def sanitize_for_json(df: pd.DataFrame) -> list[dict]:
         df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
     safe_df = df.replace({np.nan: None})
     return safe_df.to_dict(orient="records")
-
-
-def add_real_prices(df):
-    latest_cpi = df['CPI'].iloc[-1]
-    commodity_cols = [col for col in df.columns if col not in ["Date", "CPI"]]
-
-    # scale each nominal price into real 2025 dollars
-    for col in commodity_cols:
-        df[f"{col} (Real)"] = round((df[col] * (latest_cpi / df["CPI"])),2)
-    
-    return df
@@ -0,0 +1,54 @@
+from modules import income_and_spending
+from snapshots import begin_generation, collect_garbage, discard, publish
+from storage import table_path, write_table
+from store import DATA_DIR, SeriesStore
+
+
+# materialized views rebuilt on every published refresh: name -> builder(store) -> DataFrame
+VIEWS = {
+    income_and_spending.HOME_AFFORDABILITY_VIEW: income_and_spending._build_home_affordability,
+}
+
+
+def build_views(root: str) -> dict[str, str | None]:
+    """
+    Build every view from the series stored under root (an unpublished generation) and
+    write it next to them. A view whose build fails keeps the copy carried over from
+    the previous generation. Returns view name -> error (None on success).
+    """
+    store = SeriesStore(root=root)
+    errors = {}
+    for name, builder in VIEWS.items():
+        try:
+            df = builder(store)
+            write_table(table_path(root, name), df)
+            errors[name] = None
+            print(f"Built view {name} ({len(df)} rows)")
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"Error building view {name}: {e}")
+
+    return errors
+
+
+def rebuild_views(root: str = DATA_DIR):
+    """
+    Rebuild the views from the current series without pulling from FRED, publishing
+    the result as a new generation.
+    """
+    generation = begin_generation(root)
+    try:
+        errors = build_views(generation)
+    except BaseException:
+        discard(generation)
+        raise
+
+    if any(error is None for error in errors.values()):
+        publish(root, generation)
+        collect_garbage(root)
+    else:
+        discard(generation)
+
+
+if __name__ == "__main__":
+    rebuild_views()
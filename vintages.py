@@ -0,0 +1,350 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import bisect
+import calendar
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from metrics import staged
+from storage import VIEWS_DIR, locate
+from store import DATA_DIR, Series
+
+
+VINTAGES_DIR = "vintages"
+INDEX = "index.json"
+
+
+class NoVintage(LookupError):
+    """
+    Nothing was recorded for a series on or before the requested as_of date.
+    """
+
+
+def checkpoint_every() -> int:
+    """
+    Deltas between full copies (DISCO_VINTAGE_CHECKPOINT, default 16). Bounds the number of
+    segments one as_of rebuild has to merge.
+    """
+    return max(1, int(os.getenv("DISCO_VINTAGE_CHECKPOINT", "16")))
+
+
+def _timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def diff(old_dates: np.ndarray, old_values: np.ndarray, dates: np.ndarray, values: np.ndarray):
+    """
+    Delta turning (old_dates, old_values) into (dates, values): observations that are new or
+    changed, plus dates that disappeared (flagged in removed). Both inputs sorted by date.
+    Returns (dates, values, removed) sorted by date.
+    """
+    old_i8, new_i8 = old_dates.view("i8"), dates.view("i8")
+    pos = np.minimum(np.searchsorted(old_i8, new_i8), max(len(old_i8) - 1, 0))
+    found = (pos < len(old_i8)) & (old_i8[pos] == new_i8) if len(old_i8) else np.zeros(len(new_i8), dtype=bool)
+    same = np.zeros(len(new_i8), dtype=bool)
+    if len(old_i8):
+        old_at = old_values[pos]
+        same = found & ((old_at == values) | (np.isnan(old_at) & np.isnan(values)))
+
+    gone = ~np.isin(old_i8, new_i8, assume_unique=True)
+
+    out_dates = np.concatenate([dates[~same], old_dates[gone]])
+    out_values = np.concatenate([values[~same], np.full(int(gone.sum()), np.nan)])
+    removed = np.concatenate([np.zeros(int((~same).sum()), dtype=bool), np.ones(int(gone.sum()), dtype=bool)])
+    order = np.argsort(out_dates, kind="stable")
+    return out_dates[order], out_values[order], removed[order]
+
+
+def apply(segments: list[tuple[np.ndarray, np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge a base segment and the deltas after it in one pass: for every date the
+    observation from the latest segment wins, and dates it removed are dropped.
+    """
+    dates = np.concatenate([s[0] for s in segments])
+    values = np.concatenate([s[1] for s in segments])
+    removed = np.concatenate([s[2] for s in segments])
+
+    # sort by date; ties keep segment order, so the last row of each date is the newest
+    order = np.argsort(dates, kind="stable")
+    dates, values, removed = dates[order], values[order], removed[order]
+    i8 = dates.view("i8")
+    last = np.ones(len(i8), dtype=bool)
+    last[:-1] = i8[1:] != i8[:-1]
+    keep = last & ~removed
+    return dates[keep], values[keep]
+
+
+@dataclass
+class _History:
+    """
+    Parsed index.json of one series and the stat it was read at.
+    """
+    stamp: tuple
+    id: str
+    segments: list
+    days: list
+    bases: list
+
+    def version(self, pos: int) -> tuple:
+        """
+        Version of the vintage ending at segment pos, shaped like store versions
+        (kind, mtime_ns, ...) with the time it was recorded in place of the mtime.
+        """
+        segment = self.segments[pos]
+        recorded = calendar.timegm(time.strptime(segment["recorded"], "%Y-%m-%dT%H:%M:%SZ"))
+        return ("vintage", recorded * 1_000_000_000, self.id, segment["seq"])
+
+    def base_for(self, pos: int) -> int:
+        """
+        Position of the last full copy at or before segment pos.
+        """
+        return self.bases[bisect.bisect_right(self.bases, pos) - 1]
+
+
+@dataclass
+class VintageStore:
+    """
+    Point-in-time copies of stored series kept as delta segments.
+
+    Each refresh that changes a series appends a segment holding only the observations
+    that were added, revised or removed, stamped with when it was recorded; every
+    checkpoint_every() segments a full copy is written instead. index.json lists the
+    segments, so an as_of date is resolved by a binary search over their stamps and
+    rebuilt from the nearest full copy plus the few deltas after it.
+
+    Layout: <root>/<category>/fred_<id>/index.json and <seq>.{Date,values,removed}.npy.
+    """
+    root: str = f"{DATA_DIR}/{VINTAGES_DIR}"
+    max_entries: int = 256
+    _histories: dict = field(default_factory=dict)
+    _cache: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    hits: int = 0
+    misses: int = 0
+
+    def path(self, category: str, series_id: str) -> str:
+        return f"{self.root}/{category}/fred_{series_id}"
+
+    def history(self, category: str, series_id: str) -> _History | None:
+        """
+        Segment index of a series (re-read only when index.json changes), None if nothing is recorded.
+        """
+        path = f"{self.path(category, series_id)}/{INDEX}"
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+        key = (category, series_id)
+        with self._lock:
+            history = self._histories.get(key)
+        if history is not None and history.stamp == stamp:
+            return history
+
+        with open(path, "r") as f:
+            index = json.load(f)
+        segments = index["segments"]
+        history = _History(
+            stamp=stamp,
+            id=index["id"],
+            segments=segments,
+            days=[s["recorded"][:10] for s in segments],
+            bases=[i for i, s in enumerate(segments) if s["kind"] == "base"],
+        )
+        with self._lock:
+            self._histories[key] = history
+        return history
+
+    def resolve(self, category: str, series_id: str, as_of: str) -> tuple[_History, int]:
+        """
+        (history, position of the newest segment recorded on or before as_of (YYYY-MM-DD)).
+        """
+        history = self.history(category, series_id)
+        if history is None:
+            raise NoVintage(f"No vintages recorded for {category}/{series_id}")
+        pos = bisect.bisect_right(history.days, as_of) - 1
+        if pos < 0:
+            raise NoVintage(f"No vintage of {series_id} as of {as_of}; the first was recorded {history.days[0]}")
+        return history, pos
+
+    def version(self, category: str, series_id: str, as_of: str) -> tuple:
+        """
+        Change marker for the vintage as_of resolves to; stays the same while no newer
+        segment on or before as_of is recorded.
+        """
+        history, pos = self.resolve(category, series_id, as_of)
+        return history.version(pos)
+
+    def _read_segment(self, path: str, seq: int):
+        prefix = f"{path}/{seq:06d}"
+        dates = np.load(f"{prefix}.Date.npy", mmap_mode="r")
+        values = np.load(f"{prefix}.values.npy", mmap_mode="r")
+        removed = np.load(f"{prefix}.removed.npy", mmap_mode="r")
+        return dates, values, removed
+
+    @staged("load")
+    def get(self, category: str, series_id: str, as_of: str) -> Series:
+        """
+        The series as it was stored at the end of day as_of (UTC).
+        """
+        history, pos = self.resolve(category, series_id, as_of)
+        segment = history.segments[pos]
+        version = history.version(pos)
+
+        key = (category, series_id, version)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        base = history.base_for(pos)
+        path = self.path(category, series_id)
+        dates, values = apply([self._read_segment(path, s["seq"]) for s in history.segments[base:pos + 1]])
+        series = Series(category=category, series_id=series_id, name=segment["name"], dates=dates, values=values, version=version)
+
+        with self._lock:
+            self._cache[key] = series
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return series
+
+    def _write_segment(self, path: str, seq: int, dates, values, removed):
+        for column, arr in (("Date", dates), ("values", values), ("removed", removed)):
+            tmp = f"{path}/.{seq:06d}.{column}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, f"{path}/{seq:06d}.{column}.npy")
+
+    def _append(self, path: str, index: dict, kind: str, name: str, recorded: str, dates, values, removed):
+        seq = index["segments"][-1]["seq"] + 1 if index["segments"] else 0
+        self._write_segment(path, seq, dates, values, removed)
+        index["segments"].append({"seq": seq, "kind": kind, "name": name, "recorded": recorded, "rows": len(dates)})
+
+        # index.json last: readers only see segments whose files are complete
+        tmp = f"{path}/.{INDEX}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, f"{path}/{INDEX}")
+
+    def record(self, category: str, series_id: str, name: str, dates: np.ndarray, values: np.ndarray,
+               recorded: str = None, previous: tuple = None) -> str | None:
+        """
+        Record the stored state of a series. Appends a delta against the latest vintage (or a
+        full copy at checkpoints) and returns its kind, or None when nothing changed.
+
+        previous=(dates, values, recorded) seeds a series without history with the state the
+        refresh started from, so as_of dates before this refresh still resolve.
+        """
+        recorded = recorded or _timestamp(time.time())
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        values = np.asarray(values, dtype="float64")
+        if len(dates) > 1 and (np.diff(dates.view("i8")) < 0).any():
+            order = np.argsort(dates, kind="stable")
+            dates, values = dates[order], values[order]
+        path = self.path(category, series_id)
+        os.makedirs(path, exist_ok=True)
+
+        try:
+            with open(f"{path}/{INDEX}", "r") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = {"id": uuid.uuid4().hex[:12], "segments": []}
+
+        if not index["segments"] and previous is not None:
+            old_dates, old_values, old_recorded = previous
+            old_dates = np.asarray(old_dates, dtype="datetime64[ns]")
+            old_values = np.asarray(old_values, dtype="float64")
+            self._append(path, index, "base", name, old_recorded, old_dates, old_values, np.zeros(len(old_dates), dtype=bool))
+
+        if not index["segments"]:
+            self._append(path, index, "base", name, recorded, dates, values, np.zeros(len(dates), dtype=bool))
+            return "base"
+
+        latest = index["segments"][-1]
+        base = max(i for i, s in enumerate(index["segments"]) if s["kind"] == "base")
+        old_dates, old_values = apply([self._read_segment(path, s["seq"]) for s in index["segments"][base:]])
+        delta = diff(old_dates, np.asarray(old_values, dtype="float64"), dates, values)
+        if not len(delta[0]) and name == latest["name"]:
+            return None
+
+        if len(index["segments"]) - 1 - base >= checkpoint_every():
+            self._append(path, index, "base", name, recorded, dates, values, np.zeros(len(dates), dtype=bool))
+            return "base"
+        self._append(path, index, "delta", name, recorded, *delta)
+        return "delta"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+VINTAGES = VintageStore()
+
+
+def _stored(root: str, category: str, series_id: str):
+    """
+    (name, dates, values, recorded) of a stored series, recorded being when its files were last written.
+    """
+    backend, path = locate(root, category, series_id)
+    name, dates, values = backend.read(path)
+    return name, dates, values, _timestamp(os.stat(backend.marker(path)).st_mtime)
+
+
+def record_generation(previous_root: str, generation: str, results, store: VintageStore = VINTAGES) -> dict[str, str]:
+    """
+    Record a vintage for every series a refresh changed, diffing the newly published
+    generation against the one it replaced. Returns series_id -> error for failures.
+    """
+    errors = {}
+    recorded = _timestamp(time.time())
+    for r in results:
+        if not r.changed:
+            continue
+        try:
+            name, dates, values, _ = _stored(generation, r.category, r.series_id)
+            try:
+                _, old_dates, old_values, old_recorded = _stored(previous_root, r.category, r.series_id)
+                previous = (old_dates, old_values, old_recorded)
+            except FileNotFoundError:
+                previous = None
+            store.record(r.category, r.series_id, name, dates, values, recorded=recorded, previous=previous)
+        except Exception as e:
+            errors[r.series_id] = str(e)
+            print(f"Error recording vintage of {r.series_id}: {e}")
+    return errors
+
+
+def seed(root: str = DATA_DIR, store: VintageStore = VINTAGES) -> list[str]:
+    """
+    Start the history of every stored series that has none yet with a full copy of
+    what is currently stored, stamped with when it was written.
+    """
+    from snapshots import current_root
+
+    source = current_root(root)
+    seeded = []
+    for path in sorted(glob.glob(f"{source}/*/fred_*")):
+        category = os.path.basename(os.path.dirname(path))
+        series_id = os.path.basename(path)[len("fred_"):].removesuffix(".json")
+        if category == VIEWS_DIR or store.history(category, series_id) is not None:
+            continue
+        try:
+            name, dates, values, recorded = _stored(source, category, series_id)
+        except FileNotFoundError:
+            continue
+        store.record(category, series_id, name, dates, values, recorded=recorded)
+        seeded.append(series_id)
+    return seeded
+
+
+if __name__ == "__main__":
+    seeded = seed()
+    print(f"Seeded vintages for {len(seeded)} series under {VINTAGES.root}")
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from functools import partial
+import os
+import threading
+import time
+import traceback
+from catalog import CATALOG
+from compute import COMPUTE
+from deflator import get_deflator
+from store import STORE
+from views import VIEWS
+
+
+# imported in every compute worker before it is marked ready
+WORKER_MODULES = (
+    "modules.commodities",
+    "modules.demographics",
+    "modules.inflation_and_prices",
+    "modules.rates",
+    "mortgage",
+)
+
+# errors that keep the process from serving; anything else (missing series or views) only degrades it
+FATAL = ("warmup", "compute")
+
+
+@dataclass
+class Readiness:
+    """
+    Startup state reported by /ready. done flips once warm-up has finished; the process is
+    ready unless the warm-up itself or the compute pool failed. Series and views that failed
+    to load leave it degraded and are retried by recheck(), so a refresh that publishes
+    them clears the error without a restart.
+    """
+    done: bool = False
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float = None
+    series: int = 0
+    views: int = 0
+    workers: int = 0
+    errors: dict = field(default_factory=dict)
+    # error name -> (counter to bump, loader) for the failures recheck() retries
+    _retry: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not any(name in self.errors for name in FATAL)
+
+    @property
+    def status(self) -> str:
+        if not self.done:
+            return "warming"
+        return "ready" if not self.errors else "degraded"
+
+    def failed(self, name: str, error: str, counter: str = None, load=None):
+        self.errors[name] = error
+        if load is not None:
+            self._retry[name] = (counter, load)
+
+    def recheck(self):
+        """
+        Retry the series and views that failed to load against the current generation and
+        drop the errors of those that load now.
+        """
+        if not self.done or not self._retry:
+            return
+        with self._lock:
+            for name, (counter, load) in list(self._retry.items()):
+                try:
+                    load()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    continue
+                del self._retry[name]
+                self.errors.pop(name, None)
+                if counter:
+                    setattr(self, counter, getattr(self, counter) + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "seconds": self.seconds,
+            "series": self.series,
+            "views": self.views,
+            "workers": self.workers,
+            "errors": self.errors,
+        }
+
+
+def warm(readiness: Readiness, workers: int = None) -> Readiness:
+    """
+    Load every registry series and materialized view into the store in parallel, build
+    the deflator and start the compute workers. Failures are recorded, not raised:
+    a series missing on disk shouldn't keep the process from serving the others,
+    but it does leave the process degraded rather than ready.
+    """
+    try:
+        _warm(readiness, workers or int(os.getenv("DISCO_WARM_WORKERS", "8")))
+    except Exception as e:
+        # runs on an executor future nobody awaits, so this is the only place it surfaces
+        readiness.errors["warmup"] = str(e)
+        print(f"Warm-up failed: {e!r}")
+        traceback.print_exc()
+    finally:
+        readiness.seconds = round(time.perf_counter() - readiness.started, 3)
+        readiness.done = True
+
+    print(f"Warmed {readiness.series} series, {readiness.views} views and {readiness.workers} workers in {readiness.seconds:.2f}s")
+    for name, error in readiness.errors.items():
+        print(f"Warm-up error {name}: {error}")
+    return readiness
+
+
+def _warm(readiness: Readiness, workers: int):
+    entries = list(CATALOG.entries().values())
+    keys = [(entry.category, entry.id) for entry in entries]
+
+    errors = STORE.preload(keys, workers=workers)
+    for entry in entries:
+        if (entry.category, entry.id) not in errors and entry.scale != 1:
+            CATALOG.series(entry)
+    readiness.series = len(keys) - len(errors)
+    for (category, series_id), error in errors.items():
+        readiness.failed(f"{category}/{series_id}", error, "series", partial(STORE.get, category, series_id))
+
+    for name in VIEWS:
+        try:
+            STORE.table(name)
+            readiness.views += 1
+        except Exception as e:
+            readiness.failed(f"views/{name}", str(e), "views", partial(STORE.table, name))
+
+    try:
+        get_deflator()
+    except Exception as e:
+        readiness.failed("deflator", str(e), load=get_deflator)
+
+    try:
+        readiness.workers = COMPUTE.warm(WORKER_MODULES)
+    except Exception as e:
+        readiness.errors["compute"] = str(e)
+
+
+READINESS = Readiness()